@@ -0,0 +1,178 @@
+import time
+import heapq
+from collections import deque
+import numpy as np
+from arb_math import calculate_arbitrage_guaranteed, NegRiskTracker, roi_per_day
+from book_mirror import IDLE_TTL
+
+def days_tag(end_ts, now_ts):
+    return f"[{max(0, round(((end_ts or 0) - now_ts) / (24 * 3600), 1))}d] "
+
+# --- EVENT-DRIVEN DETECTOR ---
+class ArbDetector:
+    """
+    Listens to BookMirror updates and re-prices only what a token touches:
+    its YES/NO pair and/or its negRisk group. Live opportunities sit in a
+    min-heap keyed by ROI per day (best first) with lazy deletion, read by
+    best()/top(). Detection latency is measured from WebSocket receipt to
+    emission. Only books the mirror reports live are priced; an opportunity
+    is dropped as soon as one of its legs isn't. Markets past their end
+    date, or missing from scans for IDLE_TTL, are dropped on the next
+    register().
+    """
+    def __init__(self, mirror, capital=100.0, on_emit=None, idle=IDLE_TTL):
+        self.mirror = mirror
+        self.capital = capital
+        self.idle = idle
+        self.on_emit = on_emit            # fn(key, opp) on every change; opp is None when it goes away
+        self.pair_of = {}                 # token -> condition_id
+        self.pairs = {}                   # condition_id -> catalog row
+        self.groups = {}                  # event_id -> [catalog rows]
+        self.seen_at = {}                 # condition_id / event_id -> last register() that included it
+        self.tracker = None
+        self.live = {}                    # key -> opportunity
+        self._heap = []                   # (rank, seq, key)
+        self._seq = 0
+        self.latency = deque(maxlen=2000)
+        mirror.listeners.append(self.on_book)
+
+    # -- universe --
+    def register(self, candidates, groups=None):
+        """
+        Points the detector at a scan's pairs and negRisk groups, subscribes
+        their tokens, prunes what has expired or dropped out, then prices
+        everything once from the books already mirrored.
+        """
+        now = time.time()
+        groups = groups or {}
+        for c in candidates:
+            self.pairs[c['condition_id']] = c
+            self.seen_at[c['condition_id']] = now
+        for e, rows in groups.items():
+            self.groups[e] = rows
+            self.seen_at[e] = now
+        self._prune(now)
+
+        self.pair_of = {}
+        for cond_id, c in self.pairs.items():
+            self.pair_of[str(c['yes_token'])] = cond_id
+            self.pair_of[str(c['no_token'])] = cond_id
+        self.tracker = None
+        if self.groups:
+            self.tracker = NegRiskTracker({e: [r['yes_token'] for r in rows] for e, rows in self.groups.items()})
+            tops = [self._top(t) for t in self.tracker.tokens]
+            self.tracker.load([p for p, _ in tops], [s for _, s in tops])
+        # Only this scan's tokens, so markets that stop showing up can go idle in the mirror too
+        self.mirror.subscribe([t for c in candidates for t in (c['yes_token'], c['no_token'])]
+                              + [r['yes_token'] for rows in groups.values() for r in rows])
+
+        # No WebSocket receipt behind these, so they stay out of the latency stats
+        for cond_id in self.pairs: self._eval_pair(cond_id, None)
+        if self.tracker is not None:
+            for g in range(len(self.tracker.group_ids)): self._eval_group(g, None)
+
+    def _prune(self, now):
+        cutoff = now - self.idle
+        for cond_id in [k for k, c in self.pairs.items() if (c['end_ts'] or 0) <= now or self.seen_at.get(k, 0) < cutoff]:
+            del self.pairs[cond_id]
+            self.seen_at.pop(cond_id, None)
+            self._drop(f"pair:{cond_id}")
+        for e in [k for k, rows in self.groups.items() if max(r['end_ts'] or 0 for r in rows) <= now or self.seen_at.get(k, 0) < cutoff]:
+            del self.groups[e]
+            self.seen_at.pop(e, None)
+            self._drop(f"nr:{e}")
+
+    # -- hot path --
+    def _top(self, token_id):
+        """Best ask of a live book; anything else prices as 1.0 so it can't make a group look like an arb."""
+        return (self.mirror.best_ask(token_id) if self.mirror.is_live(token_id) else None) or (1.0, 0.0)
+
+    def on_book(self, token_id, book, recv_ts):
+        cond_id = self.pair_of.get(token_id)
+        if cond_id is not None:
+            self._eval_pair(cond_id, recv_ts)
+        if self.tracker is not None:
+            top = self._top(token_id)
+            g = self.tracker.update(token_id, top[0], top[1])
+            if g is not None: self._eval_group(g, recv_ts)
+
+    def _eval_pair(self, cond_id, recv_ts):
+        c = self.pairs[cond_id]
+        yes, no = str(c['yes_token']), str(c['no_token'])
+        key = f"pair:{cond_id}"
+        # A book still waiting on its first snapshot (or a resync) says nothing about the spread
+        if not (self.mirror.is_live(yes) and self.mirror.is_live(no)): return self._drop(key)
+        y, n = self.mirror.book(yes), self.mirror.book(no)
+        ty, tn = y.top("SELL"), n.top("SELL")
+        arb = calculate_arbitrage_guaranteed(ty[0], tn[0], self.capital) if ty and tn else None
+        if not arb: return self._drop(key)
+        now = time.time()
+        self._publish(key, {
+            "kind": "pair", "title": days_tag(c['end_ts'], now) + c['event_title'][:25], "condition_id": cond_id,
+            "yes_id": c['yes_token'], "no_id": c['no_token'], "p_y": ty[0], "p_n": tn[0],
+            "d_y": ty[1], "d_n": tn[1], "asks_y": y.ask_ladder(), "asks_n": n.ask_ladder(),
+            "roi": arb['roi'], "eff": arb['eff'], "ends": c['end_date'], "roi_day": roi_per_day(arb['roi'], c['end_ts'], now),
+        }, recv_ts)
+
+    def _eval_group(self, g, recv_ts):
+        key = f"nr:{self.tracker.group_ids[g]}"
+        if self.tracker.sums[g] >= 1.0: return self._drop(key)
+        a = self.tracker.offsets[g]
+        if not all(self.mirror.is_live(t) for t in self.tracker.tokens[a:a + self.tracker.sizes[g]]): return self._drop(key)
+        arb = self.tracker.group(g, self.capital)
+        if not arb: return self._drop(key)
+        rows = self.groups[arb['group']]
+        end_ts = max(r['end_ts'] or 0 for r in rows)
+        now = time.time()
+        self._publish(key, {
+            "kind": "negrisk", "title": days_tag(end_ts, now) + f"NR{len(rows)} " + rows[0]['event_title'][:20],
+            "legs": [{"id": l['id'], "price": l['price'], "size": None} for l in arb['legs']],
+            "roi": arb['roi'], "eff": round(arb['sum'], 4),
+            "ends": max(rows, key=lambda r: r['end_ts'] or 0)['end_date'], "roi_day": roi_per_day(arb['roi'], end_ts, now),
+        }, recv_ts)
+
+    def _publish(self, key, opp, recv_ts):
+        opp['detected_at'] = time.time()
+        self.live[key] = opp
+        self._seq += 1
+        heapq.heappush(self._heap, (-opp['roi_day'], self._seq, key))
+        if recv_ts is not None: self.latency.append(time.perf_counter() - recv_ts)
+        if self.on_emit:
+            self.on_emit(key, opp)
+        if len(self._heap) > 4 * len(self.live) + 64: self._compact()
+
+    def _drop(self, key):
+        # Heap entries for dropped keys are skipped lazily in top()
+        if self.live.pop(key, None) is not None and self.on_emit:
+            self.on_emit(key, None)
+
+    def _compact(self):
+        self._heap = [(-o['roi_day'], i, k) for i, (k, o) in enumerate(self.live.items())]
+        heapq.heapify(self._heap)
+
+    # -- reads --
+    def best(self):
+        """Current best live opportunity; discards stale heap tops on the way (amortized O(log n))."""
+        while self._heap:
+            rank, _, key = self._heap[0]
+            opp = self.live.get(key)
+            if opp is not None and -opp['roi_day'] == rank: return opp
+            heapq.heappop(self._heap)
+        return None
+
+    def top(self, n=10):
+        """Best n live opportunities, skipping stale heap entries."""
+        out, seen = [], set()
+        for rank, seq, key in heapq.nsmallest(n + len(self._heap) - len(self.live), self._heap):
+            opp = self.live.get(key)
+            if opp is None or key in seen or -opp['roi_day'] != rank: continue
+            seen.add(key)
+            out.append(opp)
+            if len(out) == n: break
+        return out
+
+    def latency_stats(self):
+        if not self.latency: return {}
+        us = np.array(self.latency) * 1e6
+        return {"n": len(us), "p50_us": round(float(np.percentile(us, 50)), 1),
+                "p99_us": round(float(np.percentile(us, 99)), 1), "max_us": round(float(us.max()), 1)}
@@ -0,0 +1,234 @@
+import time
+import numpy as np
+
+# --- 1. SCALAR (REFERENCE) ---
+def calculate_arbitrage_guaranteed(p_yes, p_no, total_capital):
+    combined_prob = p_yes + p_no
+    if combined_prob <= 0 or combined_prob >= 1.0: return None
+    stake_yes = (p_no / combined_prob) * total_capital
+    stake_no = (p_yes / combined_prob) * total_capital
+    if stake_yes < 1.0 or stake_no < 1.0: return None
+    expected_payout = (stake_yes / p_yes)
+    profit = expected_payout - total_capital
+    roi = (profit / total_capital) * 100
+    return {"stake_yes": round(stake_yes, 2), "stake_no": round(stake_no, 2), "profit": round(profit, 2), "roi": round(roi, 2), "eff": round(combined_prob, 4)}
+
+# --- 2. VECTORIZED ---
+def evaluate_arbitrage_vectorized(p_yes, p_no, total_capital, days_left=None, depth_yes=None, depth_no=None):
+    """
+    Same math as calculate_arbitrage_guaranteed, for every market in one pass.
+    Inputs broadcast against each other. If depth (shares at the quoted ask) is
+    given, capital per market is capped at what both sides can actually fill.
+    Returns a dict of arrays; rows where the scalar returns None have valid=False.
+    """
+    p_yes = np.asarray(p_yes, dtype=np.float64)
+    p_no = np.asarray(p_no, dtype=np.float64)
+    combined = p_yes + p_no
+    capital = np.broadcast_to(np.asarray(total_capital, dtype=np.float64), combined.shape).copy()
+    if depth_yes is not None and depth_no is not None:
+        # Each side needs capital / combined shares
+        max_fill = combined * np.minimum(np.asarray(depth_yes, dtype=np.float64), np.asarray(depth_no, dtype=np.float64))
+        capital = np.minimum(capital, max_fill)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        stake_yes = (p_no / combined) * capital
+        stake_no = (p_yes / combined) * capital
+        profit = (stake_yes / p_yes) - capital
+        roi = (profit / capital) * 100
+        if days_left is not None:
+            roi_per_day = roi / np.maximum(np.asarray(days_left, dtype=np.float64), 1.0 / 24)
+        else:
+            roi_per_day = np.full(combined.shape, np.nan)
+
+    valid = (combined > 0) & (combined < 1.0) & (stake_yes >= 1.0) & (stake_no >= 1.0)
+    return {
+        "valid": valid,
+        "capital": np.round(capital, 2),
+        "stake_yes": np.round(stake_yes, 2), "stake_no": np.round(stake_no, 2),
+        "profit": np.round(profit, 2), "roi": np.round(roi, 2), "eff": np.round(combined, 4),
+        "roi_per_day": np.round(roi_per_day, 3),
+    }
+
+def roi_per_day(roi, end_ts, now_ts):
+    """Scalar roi_per_day: ROI spread over the days left (floored at one hour)."""
+    return round(roi / max(((end_ts or 0) - now_ts) / (24 * 3600), 1.0 / 24), 3)
+
+# --- 3. DEPTH-AWARE (FULL LADDER) ---
+def ask_ladder(asks):
+    """[(price, size)] or /books-style [{"price", "size"}] -> price-sorted numpy arrays."""
+    pairs = [(float(a['price']), float(a['size'])) if isinstance(a, dict) else (float(a[0]), float(a[1])) for a in asks or []]
+    pairs.sort()
+    arr = np.array(pairs, dtype=np.float64).reshape(-1, 2)
+    return arr[:, 0], arr[:, 1]
+
+def walk_ask_ladders(yes_asks, no_asks):
+    """
+    Buys equal YES and NO shares up both ask ladders at once (payout = shares).
+    Returns the profit curve at every level break plus:
+      best_*  - size where profit peaks (last level pair still summing below 1.0)
+      max_*   - largest size whose combined average cost is still below 1.0
+    Returns None if even the best asks sum to >= 1.0.
+    """
+    py, sy = ask_ladder(yes_asks)
+    pn, sn = ask_ladder(no_asks)
+    if not len(py) or not len(pn) or py[0] + pn[0] >= 1.0: return None
+
+    cy, cn = np.cumsum(sy), np.cumsum(sn)
+    q = np.union1d(cy, cn)
+    q = q[q <= min(cy[-1], cn[-1])]
+    q0 = np.concatenate(([0.0], q[:-1]))
+    iy = np.searchsorted(cy, q0, side='right')
+    i_n = np.searchsorted(cn, q0, side='right')
+    dq = q - q0
+    cost_yes = np.cumsum(dq * py[iy])
+    cost_no = np.cumsum(dq * pn[i_n])
+    marginal = py[iy] + pn[i_n]
+    stake = cost_yes + cost_no
+    profit = q - stake
+
+    best = int(np.flatnonzero(marginal < 1.0)[-1])
+    under = np.flatnonzero(stake < q)
+    last = int(under[-1])
+    max_shares, max_stake = q[last], stake[last]
+    if last + 1 < len(q):
+        # Break-even falls inside the next segment: cost_prev + (x - q_prev) * m = x
+        m = marginal[last + 1]
+        max_shares = max_stake = (q[last] * m - stake[last]) / (m - 1.0)
+    return {
+        "shares": q, "stake": stake, "profit": profit, "marginal": marginal,
+        "stake_yes": cost_yes, "stake_no": cost_no, "price_yes": py[iy], "price_no": pn[i_n],
+        "best_shares": float(q[best]), "best_stake": float(stake[best]), "best_profit": float(profit[best]),
+        "best_stake_yes": float(cost_yes[best]), "best_stake_no": float(cost_no[best]),
+        "max_shares": float(max_shares), "max_stake": float(max_stake),
+    }
+
+def profit_at_stake(curve, total_stake):
+    """
+    Reads shares, profit and per-leg stakes for a total stake off a walk_ask_ladders
+    curve. Stakes above the profit peak are capped at best_stake. cap_yes/cap_no
+    are the deepest ask level each leg reaches (the price limit to order at).
+    """
+    stake = min(float(total_stake), curve['best_stake'])
+    at = lambda key: float(np.interp(stake, np.concatenate(([0.0], curve['stake'])), np.concatenate(([0.0], curve[key]))))
+    seg = min(int(np.searchsorted(curve['stake'], stake, side='left')), len(curve['stake']) - 1)
+    shares = at('shares')
+    return {"stake": round(stake, 2), "shares": round(shares, 2), "profit": round(shares - stake, 2),
+            "stake_yes": round(at('stake_yes'), 2), "stake_no": round(at('stake_no'), 2),
+            "cap_yes": float(curve['price_yes'][seg]), "cap_no": float(curve['price_no'][seg])}
+
+# --- 4. MULTI-OUTCOME (NEG-RISK) ---
+def evaluate_negrisk_groups(prices, offsets, total_capital, depth=None):
+    """
+    N-leg arbitrage for mutually exclusive outcome groups, all groups in one pass.
+    prices holds every leg's best YES ask, groups laid out back to back;
+    offsets[g] is the index of group g's first leg. Buying capital / sum shares
+    of every leg costs `capital` and pays exactly capital / sum, so a group is
+    an arb when its asks sum below 1.0. Leg stakes are price-weighted.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    offsets = np.asarray(offsets, dtype=np.intp)
+    sizes = np.diff(np.append(offsets, len(prices)))
+    sums = np.add.reduceat(prices, offsets)
+    capital = np.broadcast_to(np.asarray(total_capital, dtype=np.float64), sums.shape).copy()
+    if depth is not None:
+        capital = np.minimum(capital, sums * np.minimum.reduceat(np.asarray(depth, dtype=np.float64), offsets))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        shares = capital / sums
+        profit = shares - capital
+        roi = (profit / capital) * 100
+        leg_stakes = prices * np.repeat(shares, sizes)
+
+    valid = (sizes >= 2) & (sums > 0) & (sums < 1.0) & (capital >= 1.0)
+    return {
+        "valid": valid, "sums": np.round(sums, 4), "capital": np.round(capital, 2),
+        "shares": shares, "profit": np.round(profit, 2), "roi": np.round(roi, 2),
+        "leg_stakes": np.round(leg_stakes, 2),
+    }
+
+class NegRiskTracker:
+    """
+    Keeps every group's best-ask sum live. update() touches one leg and one sum
+    (O(1)), so a single price change never re-adds the whole group.
+    """
+    def __init__(self, groups):
+        # groups: {group_id: [token_id, ...]}
+        self.group_ids = list(groups)
+        tokens = [t for g in self.group_ids for t in groups[g]]
+        self.offsets = np.cumsum([0] + [len(groups[g]) for g in self.group_ids[:-1]]).astype(np.intp)
+        self.sizes = np.array([len(groups[g]) for g in self.group_ids], dtype=np.intp)
+        self.prices = np.ones(len(tokens), dtype=np.float64)  # unpriced legs count as 1.0 -> no arb
+        self.depth = np.zeros(len(tokens), dtype=np.float64)
+        self.sums = self.sizes.astype(np.float64)
+        self.where = {}
+        for g, start in enumerate(self.offsets):
+            for j in range(self.sizes[g]):
+                self.where[str(tokens[start + j])] = (g, start + j)
+        self.tokens = tokens
+
+    def load(self, prices, depth=None):
+        """Bulk (re)price every leg, then recompute all sums in one reduceat."""
+        self.prices[:] = prices
+        if depth is not None: self.depth[:] = depth
+        self.sums = np.add.reduceat(self.prices, self.offsets)
+
+    def update(self, token_id, price, size=None):
+        """Applies one leg's new best ask. Returns the group index it belongs to, or None."""
+        hit = self.where.get(str(token_id))
+        if hit is None: return None
+        g, i = hit
+        self.sums[g] += price - self.prices[i]
+        self.prices[i] = price
+        if size is not None: self.depth[i] = size
+        return g
+
+    def group(self, g, total_capital):
+        """Full N-leg evaluation for one group (or None if it isn't an arb)."""
+        a, b = self.offsets[g], self.offsets[g] + self.sizes[g]
+        res = evaluate_negrisk_groups(self.prices[a:b], [0], total_capital, depth=self.depth[a:b] if self.depth[a:b].all() else None)
+        if not res['valid'][0]: return None
+        return {"group": self.group_ids[g], "sum": float(res['sums'][0]), "roi": float(res['roi'][0]),
+                "profit": float(res['profit'][0]), "capital": float(res['capital'][0]),
+                "legs": [{"id": self.tokens[a + j], "price": float(self.prices[a + j]), "stake": float(res['leg_stakes'][j])} for j in range(b - a)]}
+
+    def arbs(self, total_capital):
+        return [r for g in np.flatnonzero(self.sums < 1.0) if (r := self.group(int(g), total_capital))]
+
+# --- 5. MICRO-BENCHMARK ---
+def benchmark(n=100_000, capital=100.0, seed=7):
+    rng = np.random.default_rng(seed)
+    p_yes = np.round(rng.uniform(0.01, 0.99, n), 3)
+    p_no = np.round(rng.uniform(0.01, 1.0 - p_yes), 3)
+    p_yes[::3] += 0.2  # a third of the book is not an arb
+
+    t0 = time.perf_counter()
+    scalar = [calculate_arbitrage_guaranteed(float(y), float(x), capital) for y, x in zip(p_yes, p_no)]
+    t_scalar = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    vec = evaluate_arbitrage_vectorized(p_yes, p_no, capital)
+    t_vec = time.perf_counter() - t0
+
+    # Rounding goes through different code paths, so allow one cent / one bp of drift
+    mismatches = 0
+    for i, s in enumerate(scalar):
+        if (s is None) != (not vec['valid'][i]): mismatches += 1
+        elif s and any(abs(s[k] - vec[k][i]) > 0.011 for k in ("stake_yes", "stake_no", "profit", "roi", "eff")): mismatches += 1
+
+    print(f"📐 ARB MATH x{n}: scalar {t_scalar * 1e3:.1f}ms | vectorized {t_vec * 1e3:.1f}ms "
+          f"| {t_scalar / t_vec:.0f}x | arbs {int(vec['valid'].sum())} | mismatches {mismatches}")
+    return mismatches
+
+def benchmark_ladder(levels=20, runs=10_000, seed=7):
+    rng = np.random.default_rng(seed)
+    yes = [(round(0.40 + 0.01 * i, 2), float(rng.integers(10, 500))) for i in range(levels)]
+    no = [(round(0.45 + 0.01 * i, 2), float(rng.integers(10, 500))) for i in range(levels)]
+    t0 = time.perf_counter()
+    for _ in range(runs): curve = walk_ask_ladders(yes, no)
+    per = (time.perf_counter() - t0) / runs
+    print(f"🪜 LADDER WALK {levels}x{levels} levels: {per * 1e6:.1f}us per book update | "
+          f"best ${curve['best_stake']:.2f} -> +${curve['best_profit']:.2f} | max ${curve['max_stake']:.2f}")
+
+if __name__ == "__main__":
+    benchmark()
+    benchmark_ladder()
@@ -0,0 +1,57 @@
+import os
+import aiohttp
+from web3 import AsyncWeb3, AsyncHTTPProvider
+from web3.middleware import ExtraDataToPOAMiddleware
+
+# --- 1. CONFIG ---
+ASYNC_RPC_CONNECTIONS = int(os.getenv("ASYNC_RPC_CONNECTIONS", 32))  # keep-alive sockets shared by every endpoint
+ASYNC_RPC_TIMEOUT = float(os.getenv("ASYNC_RPC_TIMEOUT", 10))
+
+# --- 2. ASYNC WEB3 ---
+class AsyncRpc:
+    """
+    AsyncWeb3 for Telegram handlers: RPC round trips are awaited instead of
+    blocking the event loop, so one slow node no longer stalls every user.
+    Each endpoint gets an AsyncHTTPProvider with the POA middleware, and all
+    of them share one pooled aiohttp session (created inside the running
+    loop on first use). Given an RpcPool, w3() follows its latency ranking;
+    otherwise it uses the first URL.
+    """
+    def __init__(self, urls=None, pool=None, connections=ASYNC_RPC_CONNECTIONS, timeout=ASYNC_RPC_TIMEOUT):
+        self.urls = [u for u in (urls or []) if u]
+        self.pool = pool
+        self.connections = connections
+        self.timeout = timeout
+        self._session = None
+        self._w3 = {}
+
+    async def _get_session(self):
+        if self._session is None or self._session.closed:
+            conn = aiohttp.TCPConnector(limit=self.connections, keepalive_timeout=60, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(connector=conn, timeout=aiohttp.ClientTimeout(total=self.timeout))
+            self._w3 = {}
+        return self._session
+
+    def _best_url(self):
+        if self.pool is not None and self.pool.primary is not None:
+            return self.pool.primary.url
+        return self.urls[0]
+
+    async def w3(self):
+        """AsyncWeb3 bound to the currently fastest endpoint."""
+        session = await self._get_session()
+        url = self._best_url()
+        aw3 = self._w3.get(url)
+        if aw3 is None:
+            # Request cache on: eth_chainId (asked before every eth_call) is answered locally
+            provider = AsyncHTTPProvider(url, cache_allowed_requests=True)
+            await provider.cache_async_session(session)
+            aw3 = AsyncWeb3(provider)
+            aw3.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
+            self._w3[url] = aw3
+        return aw3
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
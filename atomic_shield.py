@@ -1,13 +1,12 @@
 import os
 import asyncio
 import json
-import requests
-import websockets
+from dotenv import load_dotenv
+load_dotenv()  # before the project modules below read their env config
+from book_mirror import BookMirror
+from http_engine import HTTP
 from py_clob_client.client import ClobClient
 from py_clob_client.clob_types import ApiCreds, OrderArgs
-from dotenv import load_dotenv
-
-load_dotenv()
 
 # --- 1. ENDPOINT CONFIGURATION ---
 GAMMA_URL = "https://gamma-api.polymarket.com"
@@ -29,8 +28,7 @@ client = ClobClient(CLOB_URL, key=PK, chain_id=137, creds=creds)
 # --- 2. GAMMA: METADATA ENGINE ---
 def get_market_tokens(slug):
     """Uses Gamma API to find the Token IDs for YES and NO."""
-    url = f"{GAMMA_URL}/markets?slug={slug}"
-    res = requests.get(url).json()
+    res = HTTP.get_json(f"{GAMMA_URL}/markets", params={"slug": slug})
     # In Polymarket, 'clobTokenIds' are the keys to the trade
     tokens = json.loads(res[0]['clobTokenIds'])
     return tokens[0], tokens[1] # Returns (YES_ID, NO_ID)
@@ -38,28 +36,27 @@ def get_market_tokens(slug):
 # --- 3. DATA API: ANALYTICS ENGINE ---
 def get_volume_stats(condition_id):
     """Uses Data API to check if there is enough volume to earn."""
-    url = f"{DATA_URL}/markets/{condition_id}/stats"
-    return requests.get(url).json()
+    return HTTP.get_json(f"{DATA_URL}/markets/{condition_id}/stats")
 
 # --- 4. WEBSOCKET: 1ms LISTENER ---
-async def start_high_speed_listener(token_id):
-    """Listens to the CLOB for every single price tick."""
-    async with websockets.connect(WSS_URL) as ws:
-        subscribe_msg = {
-            "type": "subscribe",
-            "topic": "market",
-            "assets_ids": [token_id]
-        }
-        await ws.send(json.dumps(subscribe_msg))
-        print(f"📡 WSS: Listening to Token {token_id[:10]}...")
-        
-        while True:
-            msg = await ws.recv()
-            data = json.loads(msg)
-            # ⚡ ATOMIC TRIGGER:
-            # If the price drops below your target, fire the trade in <1ms
-            if "price" in data:
-                print(f"🎯 TICK: New Price {data['price']}")
+async def start_high_speed_listener(*token_ids, mirror=None):
+    """
+    Mirrors the book for every given token (reconnecting on drops) and prints
+    each new best ask. Returns the BookMirror so callers can read best prices.
+    """
+    mirror = mirror or BookMirror(f"{WSS_URL}/ws/market")
+
+    def on_tick(token_id, book, recv_ts):
+        # ⚡ ATOMIC TRIGGER:
+        # If the price drops below your target, fire the trade in <1ms
+        top = book.top("SELL")
+        if top: print(f"🎯 TICK {token_id[:10]}: ask {top[0]} x {top[1]}")
+
+    mirror.listeners.append(on_tick)
+    mirror.subscribe(token_ids)
+    mirror.start()
+    print(f"📡 WSS: Listening to {len(token_ids)} tokens...")
+    return mirror
 
 # --- 5. CLOB: THE ATOMIC HIT ---
 async def fire_atomic_trade(token_id, side, amount):
@@ -79,4 +76,7 @@ if __name__ == "__main__":
     print(f"✅ Gamma Linked: YES Token {yes_token[:10]}")
     
     # Start the engine
-    # asyncio.run(start_high_speed_listener(yes_token))
+    # async def listen():
+    #     await start_high_speed_listener(yes_token, no_token)
+    #     await asyncio.Event().wait()
+    # asyncio.run(listen())
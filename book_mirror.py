@@ -0,0 +1,326 @@
+import os
+import asyncio
+import json
+import time
+import websockets
+from tick_book import TickBook, fmt_num
+
+# --- 1. CONFIG ---
+WSS_MARKET_URL = os.getenv("WSS_MARKET_URL", "wss://ws-subscriptions-clob.polymarket.com/ws/market")
+SHARD_SIZE = int(os.getenv("BOOK_MIRROR_SHARD_SIZE", 500))  # assets per WebSocket connection
+BOOK_IMPL = os.getenv("BOOK_IMPL", "dict")  # "dict" or "tick" (NumPy tick ladder: vectorized depth, ~164MB per 10k tokens)
+BOOK_META_KEYS = ("market", "min_order_size", "tick_size", "neg_risk", "last_trade_price")
+IDLE_TTL = float(os.getenv("BOOK_MIRROR_IDLE_TTL", 300))  # unsubscribe tokens no scan has asked for in this long
+PING_EVERY = 10
+MAX_BACKOFF = 30
+
+# --- 2. LOCAL BOOK ---
+class LocalBook:
+    """One token's book: price -> size per side, with the best level cached."""
+    __slots__ = ("bids", "asks", "best_bid", "best_ask", "hash", "timestamp", "updated_at")
+
+    def __init__(self):
+        self.bids, self.asks = {}, {}
+        self.best_bid = self.best_ask = None
+        self.hash = self.timestamp = None
+        self.updated_at = 0.0
+
+    def snapshot(self, bids, asks, hash=None, timestamp=None):
+        self.bids = {float(l['price']): float(l['size']) for l in bids or [] if float(l['size']) > 0}
+        self.asks = {float(l['price']): float(l['size']) for l in asks or [] if float(l['size']) > 0}
+        self.best_bid = max(self.bids) if self.bids else None
+        self.best_ask = min(self.asks) if self.asks else None
+        self.hash, self.timestamp, self.updated_at = hash, timestamp, time.time()
+
+    def apply(self, side, price, size):
+        """One level delta. side is BUY (bids) or SELL (asks); size 0 removes the level."""
+        price, size = float(price), float(size)
+        if side.upper() in ("BUY", "BID"):
+            levels = self.bids
+            if size <= 0:
+                levels.pop(price, None)
+                if price == self.best_bid: self.best_bid = max(levels) if levels else None
+            else:
+                levels[price] = size
+                if self.best_bid is None or price > self.best_bid: self.best_bid = price
+        else:
+            levels = self.asks
+            if size <= 0:
+                levels.pop(price, None)
+                if price == self.best_ask: self.best_ask = min(levels) if levels else None
+            else:
+                levels[price] = size
+                if self.best_ask is None or price < self.best_ask: self.best_ask = price
+        self.updated_at = time.time()
+
+    def top(self, side="SELL"):
+        """(price, size) of the best level, or None."""
+        if side.upper() in ("BUY", "BID"):
+            return (self.best_bid, self.bids[self.best_bid]) if self.best_bid is not None else None
+        return (self.best_ask, self.asks[self.best_ask]) if self.best_ask is not None else None
+
+    def ask_ladder(self):
+        return sorted(self.asks.items())
+
+    def release(self):
+        pass
+
+    def as_rest_book(self, asset_id):
+        """Same shape as a /books entry so REST consumers can read the mirror unchanged."""
+        return {"asset_id": asset_id, "hash": self.hash, "timestamp": self.timestamp,
+                "bids": [{"price": fmt_num(p), "size": fmt_num(s)} for p, s in sorted(self.bids.items())],
+                "asks": [{"price": fmt_num(p), "size": fmt_num(s)} for p, s in sorted(self.asks.items(), reverse=True)]}
+
+# --- 3. MIRROR SERVICE ---
+class BookMirror:
+    """
+    Mirrors the CLOB market channel for many tokens over a few sharded
+    WebSocket connections. Books are seeded by `book` snapshots and kept
+    current by `price_change` deltas; dropped connections reconnect with
+    backoff and resubscribe their whole shard. Tokens come and go on a live
+    connection through the channel's subscribe/unsubscribe operations, and
+    prune() drops tokens that scans have stopped asking for (markets that
+    expired or closed fall out of the scan window).
+    """
+    def __init__(self, url=WSS_MARKET_URL, shard_size=SHARD_SIZE, book_factory=None):
+        self.url = url
+        self.book_factory = book_factory or (TickBook if BOOK_IMPL == "tick" else LocalBook)
+        self.shard_size = shard_size
+        self.books = {}
+        self.shards = []        # list of token-id lists
+        self._shard_of = {}
+        self._conns = {}
+        self._tasks = {}
+        self.listeners = []     # fn(token_id, book, recv_ts) called after every applied update
+        self.stats = {"messages": 0, "snapshots": 0, "deltas": 0, "reconnects": 0, "errors": 0}
+        self._running = False
+        self.meta = {}          # token -> snapshot fields that feed the exchange hash
+        self.verifier = None    # optional BookVerifier
+        self.wanted_at = {}     # token -> last time subscribe() was asked for it
+
+    # -- subscriptions --
+    def _shard_with_room(self):
+        for i, shard in enumerate(self.shards):
+            if len(shard) < self.shard_size: return i
+        self.shards.append([])
+        return len(self.shards) - 1
+
+    def subscribe(self, token_ids):
+        """
+        Adds tokens to the mirror. A connected shard picks them up with a
+        subscribe operation on the open socket; nothing reconnects.
+        """
+        now = time.time()
+        added = {}
+        for t in token_ids:
+            t = str(t)
+            if not t: continue
+            self.wanted_at[t] = now
+            if t in self._shard_of: continue
+            i = self._shard_with_room()
+            self.shards[i].append(t)
+            self._shard_of[t] = i
+            self.books[t] = self.book_factory()
+            added.setdefault(i, []).append(t)
+        for i, tokens in added.items():
+            ws = self._conns.get(i)
+            if ws is not None: asyncio.ensure_future(self._send(ws, {"assets_ids": tokens, "operation": "subscribe"}))
+            else: self._ensure_shard(i)
+        return len(added)
+
+    def unsubscribe(self, token_ids):
+        """Stops mirroring tokens and frees their books. Returns the tokens removed."""
+        removed = {}
+        for t in token_ids:
+            t = str(t)
+            i = self._shard_of.pop(t, None)
+            if i is None: continue
+            self.shards[i].remove(t)
+            self.books.pop(t).release()
+            self.meta.pop(t, None)
+            self.wanted_at.pop(t, None)
+            if self.verifier: self.verifier.forget(t)
+            removed.setdefault(i, []).append(t)
+        for i, tokens in removed.items():
+            ws = self._conns.get(i)
+            if ws is not None: asyncio.ensure_future(self._send(ws, {"assets_ids": tokens, "operation": "unsubscribe"}))
+        return [t for tokens in removed.values() for t in tokens]
+
+    def prune(self, idle=IDLE_TTL):
+        """Unsubscribes every token nobody has asked for in `idle` seconds."""
+        cutoff = time.time() - idle
+        return self.unsubscribe([t for t, ts in self.wanted_at.items() if ts < cutoff])
+
+    async def _send(self, ws, msg):
+        try: await ws.send(json.dumps(msg))
+        except Exception as e: print(f"⚠️ MIRROR {msg.get('operation')} failed: {e}")
+
+    def _ensure_shard(self, i):
+        task = self._tasks.get(i)
+        if self._running and (task is None or task.done()):
+            self._tasks[i] = asyncio.ensure_future(self._run_shard(i))
+
+    def start(self):
+        self._running = True
+        for i in range(len(self.shards)): self._ensure_shard(i)
+
+    async def stop(self):
+        self._running = False
+        for t in self._tasks.values(): t.cancel()
+        for ws in list(self._conns.values()): await ws.close()
+
+    # -- O(1) reads --
+    def book(self, token_id):
+        return self.books.get(str(token_id))
+
+    def best_ask(self, token_id):
+        b = self.books.get(str(token_id))
+        return b.top("SELL") if b else None
+
+    def best_bid(self, token_id):
+        b = self.books.get(str(token_id))
+        return b.top("BUY") if b else None
+
+    def is_live(self, token_id, max_age=60):
+        """Fresh, snapshotted and (with a verifier) not known to have diverged from the exchange."""
+        t = str(token_id)
+        b = self.books.get(t)
+        if not (b and b.hash is not None and time.time() - b.updated_at < max_age): return False
+        return self.verifier is None or self.verifier.trusted(t)
+
+    # -- connection loop --
+    async def _run_shard(self, i):
+        backoff = 1
+        while self._running:
+            try:
+                async with websockets.connect(self.url, ping_interval=None, max_size=None) as ws:
+                    initial = list(self.shards[i])
+                    await ws.send(json.dumps({"assets_ids": initial, "type": "market"}))
+                    # Tokens added while that was in flight go out as a follow-up subscribe;
+                    # once the shard is in _conns, subscribe() sends them itself
+                    sent = set(initial)
+                    while (late := [t for t in self.shards[i] if t not in sent]):
+                        await ws.send(json.dumps({"assets_ids": late, "operation": "subscribe"}))
+                        sent.update(late)
+                    self._conns[i] = ws
+                    print(f"📡 MIRROR shard {i}: {len(self.shards[i])} assets")
+                    backoff = 1
+                    pinger = asyncio.ensure_future(self._ping(ws))
+                    try:
+                        async for raw in ws:
+                            self._handle(raw, time.perf_counter())
+                    finally:
+                        pinger.cancel()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ MIRROR shard {i} dropped: {e}")
+            finally:
+                self._conns.pop(i, None)
+                # Books are stale until the resubscribe snapshot lands; tell listeners so they drop what they built on them
+                for t in self.shards[i]:
+                    self.books[t].hash = None
+                    self._emit(t, self.books[t], None)
+            if not self._running: break
+            self.stats["reconnects"] += 1
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, MAX_BACKOFF)
+
+    async def _ping(self, ws):
+        while True:
+            await asyncio.sleep(PING_EVERY)
+            await ws.send("PING")
+
+    # -- message handling --
+    def _handle(self, raw, recv_ts):
+        if raw in ("PONG", "pong"): return
+        self.stats["messages"] += 1
+        try: msgs = json.loads(raw)
+        except ValueError: return
+        for m in msgs if isinstance(msgs, list) else [msgs]:
+            # One bad message must not take the whole shard (and its reconnect) down with it
+            try: self._dispatch(m, recv_ts)
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"⚠️ MIRROR bad {m.get('event_type') if isinstance(m, dict) else 'message'}: {e}")
+
+    def _dispatch(self, m, recv_ts):
+        kind = m.get('event_type')
+        if kind == 'book':
+            self._on_book(m, recv_ts)
+        elif kind == 'price_change':
+            self._on_price_change(m, recv_ts)
+        elif kind in ('last_trade_price', 'tick_size_change'):
+            # Both feed the book hash, so keep them current between snapshots
+            meta = self.meta.get(str(m.get('asset_id')))
+            if meta is None: return
+            if kind == 'last_trade_price': meta['last_trade_price'] = m.get('price', meta['last_trade_price'])
+            else: meta['tick_size'] = m.get('new_tick_size', meta['tick_size'])
+
+    def load_snapshot(self, m, recv_ts=None):
+        """Applies a full book (WS `book` event or a /books REST entry)."""
+        self._on_book(m, time.perf_counter() if recv_ts is None else recv_ts)
+
+    def _on_book(self, m, recv_ts):
+        t = str(m.get('asset_id'))
+        book = self.books.get(t)
+        if book is None: return
+        args = (m.get('bids') or m.get('buys'), m.get('asks') or m.get('sells'), m.get('hash'), m.get('timestamp'))
+        try: book.snapshot(*args)
+        except ValueError:
+            book = self._widen(t)
+            book.snapshot(*args)
+        self.meta[t] = {k: m.get(k) for k in BOOK_META_KEYS}
+        self.stats["snapshots"] += 1
+        if self.verifier: self.verifier.on_snapshot(t, book)
+        self._emit(t, book, recv_ts)
+
+    def _on_price_change(self, m, recv_ts):
+        # Current format: price_changes[] each carrying its own asset_id and post-change hash.
+        # Older format: one asset_id + changes[] + a single hash.
+        touched = {}
+        for c in m.get('price_changes') or []:
+            t = str(c.get('asset_id'))
+            book = self.books.get(t)
+            if book is None: continue
+            book = self._apply(t, book, c)
+            book.hash, book.timestamp = c.get('hash', book.hash), m.get('timestamp', book.timestamp)
+            touched[t] = book
+        if m.get('changes'):
+            t = str(m.get('asset_id'))
+            book = self.books.get(t)
+            if book is not None:
+                for c in m['changes']: book = self._apply(t, book, c)
+                book.hash, book.timestamp = m.get('hash', book.hash), m.get('timestamp', book.timestamp)
+                touched[t] = book
+        self.stats["deltas"] += len(touched)
+        for t, book in touched.items():
+            # A book that fails its hash check is not emitted; it waits for the resync snapshot
+            if self.verifier and not self.verifier.on_delta(t, book): continue
+            self._emit(t, book, recv_ts)
+
+    def _apply(self, token_id, book, c):
+        try: book.apply(c['side'], c['price'], c['size'])
+        except ValueError:
+            book = self._widen(token_id)
+            book.apply(c['side'], c['price'], c['size'])
+        return book
+
+    def _widen(self, token_id):
+        """
+        Swaps a tick-ladder book that met an off-grid price (the market moved
+        to 0.0001 ticks) for a LocalBook holding the same levels.
+        """
+        old = self.books[token_id]
+        book = LocalBook()
+        book.snapshot([{"price": p, "size": s} for p, s in old.bids.items()],
+                      [{"price": p, "size": s} for p, s in old.asks.items()], old.hash, old.timestamp)
+        book.updated_at = old.updated_at
+        old.release()
+        self.books[token_id] = book
+        return book
+
+    def _emit(self, token_id, book, recv_ts):
+        for fn in self.listeners:
+            try: fn(token_id, book, recv_ts)
+            except Exception as e: print(f"⚠️ MIRROR listener error: {e}")
@@ -0,0 +1,116 @@
+import os
+import asyncio
+import json
+import hashlib
+from tick_book import fmt_num
+from clob_books import fetch_books
+from http_engine import ENGINE
+
+# --- 1. CONFIG ---
+RESYNC_DELAY = float(os.getenv("BOOK_RESYNC_DELAY", 0.25))  # batch window for resync fetches
+MAX_STRIKES = 3  # back-to-back failed resyncs before a token is treated as unverifiable
+
+# --- 2. EXCHANGE HASH ---
+def book_hash(asset_id, book, meta=None):
+    """
+    Recomputes the CLOB's book hash: SHA1 over the compact JSON summary with
+    an empty hash field, bids ascending, asks descending (same as
+    py_clob_client.utilities.generate_orderbook_summary_hash).
+    """
+    meta = meta or {}
+    payload = {
+        "market": meta.get('market'), "asset_id": asset_id, "timestamp": book.timestamp, "hash": "",
+        "bids": [{"price": fmt_num(p), "size": fmt_num(s)} for p, s in sorted(book.bids.items())],
+        "asks": [{"price": fmt_num(p), "size": fmt_num(s)} for p, s in sorted(book.asks.items(), reverse=True)],
+        "min_order_size": meta.get('min_order_size'), "tick_size": meta.get('tick_size'),
+        "neg_risk": meta.get('neg_risk'), "last_trade_price": meta.get('last_trade_price'),
+    }
+    return hashlib.sha1(json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")).hexdigest()
+
+# --- 3. VERIFIER ---
+class BookVerifier:
+    """
+    Checks every mirrored book against the hash the exchange sends with it.
+    A snapshot whose own hash we can't reproduce (format drift, fields we don't
+    mirror) marks the token unverifiable instead of looping on resyncs. A delta
+    that breaks the hash holds the book back and queues the token; queued
+    tokens are re-snapshotted together in one POST /books after a short delay,
+    so a burst of gaps costs one round trip rather than a reconnect.
+    """
+    def __init__(self, mirror, engine=ENGINE, delay=RESYNC_DELAY):
+        self.mirror = mirror
+        self.engine = engine
+        self.delay = delay
+        self.unverifiable = set()
+        self.pending = set()
+        self.strikes = {}
+        self._flush = None
+        self.stats = {"verified": 0, "mismatches": 0, "resyncs": 0, "unverifiable": 0}
+        mirror.verifier = self
+
+    def trusted(self, token_id):
+        """False while a token awaits its resync, or if its hash can't be checked at all."""
+        return token_id not in self.pending and token_id not in self.unverifiable
+
+    def forget(self, token_id):
+        """Drops all state for a token the mirror no longer carries."""
+        self.pending.discard(token_id)
+        self.unverifiable.discard(token_id)
+        self.strikes.pop(token_id, None)
+
+    def _matches(self, token_id, book):
+        return book_hash(token_id, book, self.mirror.meta.get(token_id)) == book.hash
+
+    def on_snapshot(self, token_id, book):
+        self.pending.discard(token_id)
+        if not book.hash: return
+        if self._matches(token_id, book):
+            self.unverifiable.discard(token_id)
+            self.stats["verified"] += 1
+        elif token_id not in self.unverifiable:
+            self.unverifiable.add(token_id)
+            self.stats["unverifiable"] += 1
+
+    def on_delta(self, token_id, book):
+        """False if the book diverged from the exchange; the caller should not use it."""
+        if token_id in self.pending: return False
+        if not book.hash or token_id in self.unverifiable: return True
+        if self._matches(token_id, book):
+            self.strikes.pop(token_id, None)
+            self.stats["verified"] += 1
+            return True
+        self.stats["mismatches"] += 1
+        self.strikes[token_id] = self.strikes.get(token_id, 0) + 1
+        if self.strikes[token_id] > MAX_STRIKES:
+            # Resyncing isn't fixing it, so the hash inputs are what's off, not the book
+            self.unverifiable.add(token_id)
+            self.stats["unverifiable"] += 1
+            return True
+        print(f"⚠️ BOOK hash mismatch {token_id[:10]}… queued for resync")
+        self.pending.add(token_id)
+        if self._flush is None or self._flush.done():
+            self._flush = asyncio.ensure_future(self._resync())
+        return False
+
+    async def _resync(self):
+        await asyncio.sleep(self.delay)
+        # Tokens stay pending (not trusted) until their fresh copy is in, so nothing reads them mid-fetch
+        tokens = list(self.pending)
+        if not tokens: return
+        try:
+            books = await fetch_books(tokens, engine=self.engine)
+        except Exception as e:
+            print(f"⚠️ BOOK resync failed: {e}")
+            books = {}
+        for t in tokens:
+            if t not in self.mirror.books or t not in self.pending: continue   # unsubscribed, or a WS snapshot got there first
+            if t in books:
+                self.mirror.load_snapshot(books[t])
+                self.stats["resyncs"] += 1
+            else:
+                # No fresh copy: leave it stale until the next WS snapshot
+                self.mirror.books[t].hash = None
+                self.pending.discard(t)
+        # Mismatches that came in during the fetch
+        if self.pending:
+            self._flush = asyncio.ensure_future(self._resync())
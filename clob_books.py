@@ -0,0 +1,54 @@
+import os
+import json
+from http_engine import ENGINE
+
+# --- 1. CONFIG ---
+CLOB_URL = "https://clob.polymarket.com"
+# Max token IDs per POST /books call
+BOOKS_BATCH_SIZE = int(os.getenv("BOOKS_BATCH_SIZE", 100))
+
+def json_list(v):
+    """Gamma returns list fields (outcomes, outcomePrices, clobTokenIds) as JSON strings."""
+    if isinstance(v, str):
+        try: return json.loads(v)
+        except: return []
+    return v or []
+
+def market_tokens(m):
+    """Maps a Gamma market to {"YES": token_id, "NO": token_id}."""
+    outcomes = [str(o).upper() for o in json_list(m.get('outcomes'))]
+    tokens = json_list(m.get('clobTokenIds'))
+    if len(outcomes) != len(tokens): return {}
+    return dict(zip(outcomes, tokens))
+
+def chunked(seq, n):
+    for i in range(0, len(seq), n):
+        yield seq[i:i + n]
+
+# --- 2. BATCH FETCH ---
+async def fetch_books(token_ids, batch_size=BOOKS_BATCH_SIZE, engine=ENGINE):
+    """
+    Pulls order books for every token in ceil(N / batch_size) concurrent
+    POST /books calls. Returns {token_id: book}; failed batches are skipped.
+    """
+    ids = list(dict.fromkeys(str(t) for t in token_ids))
+    payloads = [[{"token_id": t} for t in batch] for batch in chunked(ids, batch_size)]
+    results = await engine.gather(engine.post_json(f"{CLOB_URL}/books", p) for p in payloads)
+    books = {}
+    for batch in results:
+        for b in batch or []:
+            books[str(b.get('asset_id'))] = b
+    return books
+
+def best_ask(book):
+    """Lowest ask as (price, size), or None if the side is empty."""
+    asks = (book or {}).get('asks') or []
+    if not asks: return None
+    a = min(asks, key=lambda lvl: float(lvl['price']))
+    return float(a['price']), float(a['size'])
+
+def best_bid(book):
+    bids = (book or {}).get('bids') or []
+    if not bids: return None
+    b = max(bids, key=lambda lvl: float(lvl['price']))
+    return float(b['price']), float(b['size'])
@@ -0,0 +1,63 @@
+import os
+import asyncio
+import time
+import functools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+# --- 1. CONFIG ---
+CLOB_EXEC_THREADS = int(os.getenv("CLOB_EXEC_THREADS", 2))       # user clicks: sign + post
+CLOB_BACKGROUND_THREADS = int(os.getenv("CLOB_BACKGROUND_THREADS", 1))  # pre-signing passes
+
+# --- 2. WORKER ---
+class ClobWorker:
+    """
+    Owns the synchronous ClobClient and runs every call on its own threads,
+    so signing and HTTP never block the bot's event loop. Clicks and
+    background work use separate lanes: a slow pre-signing pass can't delay
+    an EXECUTE. watch_loop() samples event-loop lag so you can check the bot
+    stays responsive while orders are in flight.
+    """
+    def __init__(self, client, exec_threads=CLOB_EXEC_THREADS, background_threads=CLOB_BACKGROUND_THREADS):
+        self.client = client
+        self.lanes = {
+            "exec": ThreadPoolExecutor(max_workers=exec_threads, thread_name_prefix="clob-exec"),
+            "background": ThreadPoolExecutor(max_workers=background_threads, thread_name_prefix="clob-bg"),
+        }
+        self.inflight = 0
+        self.stats = {"calls": 0, "errors": 0}
+        self.lag = deque(maxlen=1000)
+
+    async def run(self, fn, *args, lane="exec", **kwargs):
+        """Runs fn(*args, **kwargs) on a worker thread and awaits its result."""
+        self.inflight += 1
+        self.stats["calls"] += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.lanes[lane], functools.partial(fn, *args, **kwargs))
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+        finally:
+            self.inflight -= 1
+
+    async def call(self, method, *args, lane="exec", **kwargs):
+        """Awaitable ClobClient method call: await worker.call("get_order_book", token_id)."""
+        return await self.run(getattr(self.client, method), *args, lane=lane, **kwargs)
+
+    # -- responsiveness --
+    async def watch_loop(self, interval=0.1):
+        """Records how late the event loop wakes up from a fixed sleep (0 = perfectly responsive)."""
+        while True:
+            t0 = time.perf_counter()
+            await asyncio.sleep(interval)
+            self.lag.append(max(time.perf_counter() - t0 - interval, 0.0))
+
+    def lag_stats(self):
+        if not self.lag: return {}
+        ms = np.array(self.lag) * 1e3
+        return {"n": len(ms), "p50_ms": round(float(np.percentile(ms, 50)), 2),
+                "p99_ms": round(float(np.percentile(ms, 99)), 2), "max_ms": round(float(ms.max()), 2)}
+
+    def shutdown(self):
+        for pool in self.lanes.values(): pool.shutdown(wait=False, cancel_futures=True)
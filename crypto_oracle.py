@@ -1,4 +1,4 @@
-import requests
+from http_engine import HTTP
 
 class CryptoOracle:
     def __init__(self, symbol="BTCUSDT"):
@@ -7,7 +7,7 @@ class CryptoOracle:
     def get_binance_price(self):
         """Gets the ultra-fast spot price from Binance."""
         try:
-            return float(requests.get(self.url).json()['price'])
+            return float(HTTP.get_json(self.url)['price'])
         except: return None
 
     def check_strike_opportunity(self, target_price, side="above", current_poly_price=0.5):
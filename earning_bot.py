@@ -2,6 +2,8 @@ import os
 import asyncio
 from decimal import Decimal
 from web3 import Web3
+from nonce_manager import NonceManager
+from fee_oracle import FeeOracle
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ApplicationBuilder, CommandHandler, CallbackQueryHandler, MessageHandler, filters, ContextTypes
 
@@ -9,6 +11,8 @@ from telegram.ext import ApplicationBuilder, CommandHandler, CallbackQueryHandle
 w3 = Web3(Web3.HTTPProvider(os.getenv("RPC_URL")))
 PK = os.getenv("WALLET_PRIVATE_KEY")
 account = w3.eth.account.from_key(PK)
+NONCES = NonceManager(w3)
+FEES = FeeOracle(w3)
 
 # Buffer Finance Arbitrum Mainnet Addresses
 ROUTER_ADDRESS = "0x311334883921Fb1b813826E585dF1C2be4358615" # Official Router
@@ -32,23 +36,22 @@ async def place_real_bet(context, chat_id, side):
 
     try:
         contract = w3.eth.contract(address=ROUTER_ADDRESS, abi=ROUTER_ABI)
-        nonce = w3.eth.get_transaction_count(account.address)
+        fees = await asyncio.to_thread(FEES.fees)
 
         # Build 'initiateTrade' transaction
         # assetPair 0 = BTC/USD, timeframe 300 = 5 Minutes
-        tx = contract.functions.initiateTrade(
+        build = lambda nonce: contract.functions.initiateTrade(
             usdc_amount, 0, direction, 300
         ).build_transaction({
             'from': account.address,
             'nonce': nonce,
             'gas': 500000,
-            'gasPrice': w3.eth.gas_price,
+            **fees,
             'chainId': 42161
         })
 
-        # Sign and Send
-        signed_tx = w3.eth.account.sign_transaction(tx, PK)
-        tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+        # Sign and Send (nonce allocated locally, returned to the pool if the send fails)
+        tx_hash = NONCES.send(account.address, build, PK)
 
         report = (
             f"✅ **REAL BET PLACED!**\n"
@@ -68,16 +71,16 @@ async def approve_usdc(update, context):
     usdc_abi = '[{"inputs":[{"internalType":"address","name":"spender","type":"address"},{"internalType":"uint256","name":"amount","type":"uint256"}],"name":"approve","outputs":[{"internalType":"bool","name":"","type":"bool"}],"stateMutability":"nonpayable","type":"function"}]'
     usdc_contract = w3.eth.contract(address=USDC_ADDRESS, abi=usdc_abi)
     
-    tx = usdc_contract.functions.approve(
+    fees = await asyncio.to_thread(FEES.fees)
+    build = lambda nonce: usdc_contract.functions.approve(
         ROUTER_ADDRESS, 2**256 - 1 # Infinite approval for convenience
     ).build_transaction({
         'from': account.address,
-        'nonce': w3.eth.get_transaction_count(account.address),
+        'nonce': nonce,
         'gas': 100000,
-        'gasPrice': w3.eth.gas_price,
+        **fees,
         'chainId': 42161
     })
-    
-    signed = w3.eth.account.sign_transaction(tx, PK)
-    tx_hash = w3.eth.send_raw_transaction(signed.raw_transaction)
+
+    tx_hash = NONCES.send(account.address, build, PK)
     await update.message.reply_text(f"🚀 **Approval Sent!** \nHash: `{tx_hash.hex()}`")
@@ -1,11 +1,20 @@
+import asyncio
+import os
 import redeemer # Import the file we just made
 
-async def run_atomic_execution(context, chat_id, side):
+PAYOUT_DEADLINE = float(os.getenv("PAYOUT_DEADLINE", 180))   # give up waiting for resolution after this
+PAYOUT_POLL = float(os.getenv("PAYOUT_POLL", 5))
+
+async def run_atomic_execution(context, chat_id, side, condition_id=None):
     """
     DUAL RECEIPT SYSTEM:
     Receipt 1: The Bet (Stake goes into the Pool)
     Receipt 2: The Payout (Profit comes out of the Pool)
+    condition_id is the bet's market (default: context.user_data['condition_id']);
+    Receipt 2 is only sent once that market's redemption has mined successfully.
     """
+    cid = (condition_id or context.user_data.get('condition_id') or "").lower()
+
     # --- RECEIPT 1: THE STAKE ---
     # This sends the money INTO the liquidity pool
     stake_tx_hash = await send_stake_to_pool(context, side)
@@ -17,21 +26,40 @@ async def run_atomic_execution(context, chat_id, side):
     )
 
     # --- THE WAIT ---
-    # We must wait for the pool to calculate the profit
-    await asyncio.sleep(65) # Wait for 1-minute market resolution
+    # Poll until the bet's market resolves on-chain instead of sleeping a fixed 65s;
+    # each pass also settles anything else that has resolved since the last one
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + PAYOUT_DEADLINE
 
     # --- RECEIPT 2: THE PAYOUT ---
     # This pulls the money OUT of the liquidity pool
     try:
-        payout_tx_hash = await redeemer.claim_payout("0xCONTRACT_ADDRESS_HERE")
-        
+        if not cid: raise RuntimeError("bet's condition_id unknown")
+        while True:
+            result = await redeemer.redeem_resolved(wait=True)
+            sent = {c.lower(): h for c, h in result["sent"].items()}
+            failed = {c.lower(): e for c, e in result["failed"].items()}
+            if cid in sent or cid in failed or loop.time() > deadline: break
+            await asyncio.sleep(PAYOUT_POLL)
+        if cid in failed:
+            raise RuntimeError(f"redemption not sent: {failed[cid]}")
+        if cid not in sent:
+            raise TimeoutError(f"{result['unresolved']} unresolved, {len(result['failed'])} failed")
+
+        tx = sent[cid]
+        status = {c.lower(): s for c, s in result.get("mined", {}).items()}.get(cid)
+        if status != 1:
+            raise RuntimeError(f"redemption {'reverted' if status == 0 else 'not mined in time'}: {tx}")
         report = (
             f"📜 **RECEIPT 2 (PAYOUT):** Profit + Stake Claimed!\n"
-            f"💰 **Status:** Funds returned to Vault\n"
-            f"🔗 [View Payout](https://polygonscan.com/tx/{payout_tx_hash})"
+            f"💰 **Status:** Redeemed to Vault\n"
+            f"🔗 [View Payout](https://polygonscan.com/tx/{tx})"
         )
         await context.bot.send_message(chat_id, report, parse_mode='Markdown')
         return True
-    except Exception as e:
+    except TimeoutError:
         await context.bot.send_message(chat_id, f"⚠️ **Payout Delayed:** Oracle still resolving...")
         return False
+    except Exception as e:
+        await context.bot.send_message(chat_id, f"❌ **Payout Failed:** `{e}`")
+        return False
@@ -3,6 +3,7 @@ import asyncio
 from py_clob_client.client import ClobClient
 from py_clob_client.clob_types import OrderArgs, OrderType
 from py_clob_client.order_builder.constants import BUY
+from tick_book import load_rest_book
 
 # --- 1. THE INITIALIZATION (Your Logic) ---
 async def initialize_earning_client():
@@ -24,8 +25,10 @@ async def execute_atomic_hit(client, token_id, stake_usd):
     
     try:
         # STEP 1: Get the 1ms Snapshot
-        book = client.get_orderbook(token_id)
-        best_ask = float(book.asks[0].price)
+        book = load_rest_book(token_id, client.get_order_book(token_id))
+        if book.best_ask is None:
+            return "❌ Empty book. Trade aborted."
+        best_ask = book.best_ask
         
         # STEP 2: Atomic Decision
         # Only buy if the price is 'fair' (e.g., under 0.65)
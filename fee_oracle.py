@@ -0,0 +1,80 @@
+import os
+import threading
+import time
+
+# --- 1. CONFIG ---
+FEE_HISTORY_BLOCKS = int(os.getenv("FEE_HISTORY_BLOCKS", 10))
+FEE_REFRESH_INTERVAL = float(os.getenv("FEE_REFRESH_INTERVAL", 2))  # ~one Polygon block
+FEE_MAX_AGE = float(os.getenv("FEE_MAX_AGE", 30))                   # refresh inline if the cache is older than this
+FEE_BASE_MULTIPLIER = 2                                               # headroom for ~6 consecutive full blocks
+PERCENTILES = {"slow": 25, "standard": 50, "fast": 90}
+# Chains enforce a minimum tip (Polygon rejects < 25-30 gwei); Arbitrum has none
+MIN_PRIORITY_GWEI = {137: 30, 80002: 30, 42161: 0}
+
+# --- 2. ORACLE ---
+class FeeOracle:
+    """
+    EIP-1559 fees from one eth_feeHistory call per block: the next block's
+    base fee plus the median 25th/50th/90th percentile tips over the last
+    FEE_HISTORY_BLOCKS blocks. Long-lived processes call start() once at
+    startup: a daemon thread then keeps it current, so fees() is a dict
+    lookup on the hot path. Without start(), or if the cache is older than
+    FEE_MAX_AGE, fees() makes one blocking refresh itself (one-shot scripts
+    just call fees(); async callers should run it via asyncio.to_thread).
+    """
+    def __init__(self, w3, blocks=FEE_HISTORY_BLOCKS, refresh_interval=FEE_REFRESH_INTERVAL):
+        self.w3 = w3
+        self.blocks = blocks
+        self.refresh_interval = refresh_interval
+        self.block = None
+        self.base_fee = None
+        self.tips = {}
+        self.min_tip = None
+        self.updated_at = 0.0
+        self._lock = threading.Lock()
+        self._thread = None
+        self.stats = {"refreshes": 0, "skipped": 0, "served": 0}
+
+    def refresh(self):
+        """Fetches fee history unless it's for a block we already have. Returns the block number."""
+        if self.min_tip is None:
+            self.min_tip = MIN_PRIORITY_GWEI.get(self.w3.eth.chain_id, 0) * 10**9
+        hist = self.w3.eth.fee_history(self.blocks, 'latest', sorted(PERCENTILES.values()))
+        # baseFeePerGas has one extra entry: the base fee of the block after the newest one
+        block = hist['oldestBlock'] + len(hist['baseFeePerGas']) - 2
+        if block == self.block:
+            self.updated_at = time.time()
+            self.stats["skipped"] += 1
+            return block
+        rewards = [r for r in hist.get('reward') or [] if r]
+        tips = {}
+        for i, (speed, _) in enumerate(sorted(PERCENTILES.items(), key=lambda kv: kv[1])):
+            column = sorted(r[i] for r in rewards)
+            tips[speed] = max(column[len(column) // 2] if column else 0, self.min_tip)
+        with self._lock:
+            self.block, self.base_fee, self.tips, self.updated_at = block, hist['baseFeePerGas'][-1], tips, time.time()
+        self.stats["refreshes"] += 1
+        return block
+
+    def start(self):
+        """First fetch now, then keep refreshing in the background."""
+        self.refresh()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="fee-oracle", daemon=True)
+            self._thread.start()
+        return self
+
+    def _loop(self):
+        while True:
+            time.sleep(self.refresh_interval)
+            try: self.refresh()
+            except Exception as e: print(f"⚠️ FEE ORACLE refresh failed: {e}")
+
+    def fees(self, speed="standard"):
+        """Type-2 fee fields for build_transaction: {'maxFeePerGas', 'maxPriorityFeePerGas'}."""
+        if self.base_fee is None or time.time() - self.updated_at > FEE_MAX_AGE: self.refresh()
+        with self._lock:
+            tip = self.tips[speed]
+            base = self.base_fee
+        self.stats["served"] += 1
+        return {"maxFeePerGas": FEE_BASE_MULTIPLIER * base + tip, "maxPriorityFeePerGas": tip}
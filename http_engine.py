@@ -0,0 +1,207 @@
+import os
+import asyncio
+import time
+from urllib.parse import urlsplit
+import httpx
+
+# --- 1. POOL CONFIG ---
+# One keep-alive pool for the whole bot. Each host also gets its own semaphore
+# so a burst against Gamma can't starve the CLOB (and vice versa).
+MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", 100))
+PER_HOST_CONCURRENCY = int(os.getenv("HTTP_PER_HOST_CONCURRENCY", 16))
+DEFAULT_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", 5))
+try:
+    import h2  # noqa: F401 -- httpx only negotiates HTTP/2 when h2 is installed
+    HTTP2 = os.getenv("HTTP2", "1") != "0"
+except ImportError:
+    HTTP2 = False
+
+# Per-endpoint timeouts: the longest "host/path" prefix that matches the URL wins
+ENDPOINT_TIMEOUTS = {
+    "clob.polymarket.com": 5,
+    "clob.polymarket.com/books": 4,
+    "gamma-api.polymarket.com": 8,
+    "data-api.polymarket.com": 8,
+    "api.binance.com": 2,
+    "api.coingecko.com": 5,
+}
+PREWARM_HOSTS = ("https://clob.polymarket.com", "https://gamma-api.polymarket.com", "https://data-api.polymarket.com")
+
+def timeout_for(url, default=DEFAULT_TIMEOUT):
+    parts = urlsplit(url)
+    target = parts.netloc + parts.path
+    best = max((k for k in ENDPOINT_TIMEOUTS if target.startswith(k)), key=len, default=None)
+    return ENDPOINT_TIMEOUTS[best] if best else default
+
+# --- 2. CONNECTION REUSE ---
+class ReuseStats:
+    """
+    Counts requests and freshly opened connections per host via httpcore's
+    `trace` extension. Reuse = share of requests that rode an existing
+    keep-alive (or HTTP/2) connection instead of paying TCP+TLS again.
+    """
+    def __init__(self):
+        self.requests = {}
+        self.connects = {}
+
+    def _record(self, host, event):
+        if event == "connection.connect_tcp.complete":
+            self.connects[host] = self.connects.get(host, 0) + 1
+
+    def sync_trace(self, url):
+        host = urlsplit(url).netloc
+        self.requests[host] = self.requests.get(host, 0) + 1
+        return lambda event, info: self._record(host, event)
+
+    def async_trace(self, url):
+        host = urlsplit(url).netloc
+        self.requests[host] = self.requests.get(host, 0) + 1
+        async def trace(event, info): self._record(host, event)
+        return trace
+
+    def as_dict(self):
+        out = {}
+        for host, n in self.requests.items():
+            c = self.connects.get(host, 0)
+            out[host] = {"requests": n, "new_conns": c, "reuse": round(100.0 * max(n - c, 0) / n, 1)}
+        return out
+
+    def overall(self):
+        n, c = sum(self.requests.values()), sum(self.connects.values())
+        return round(100.0 * max(n - c, 0) / n, 1) if n else None
+
+HTTP_STATS = ReuseStats()
+
+def _limits(max_connections):
+    return httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections, keepalive_expiry=60)
+
+# --- 3. ASYNC ENGINE ---
+class AsyncHttpEngine:
+    def __init__(self, per_host=PER_HOST_CONCURRENCY, max_connections=MAX_CONNECTIONS, timeout=DEFAULT_TIMEOUT, stats=HTTP_STATS):
+        self.per_host = per_host
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.stats = stats
+        self._client = None
+        self._host_sems = {}
+        self.requests_sent = 0
+
+    @property
+    def client(self):
+        """Lazily builds the pooled client inside the running event loop."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(limits=_limits(self.max_connections), timeout=self.timeout, http2=HTTP2)
+        return self._client
+
+    def _sem(self, url):
+        host = urlsplit(url).netloc
+        sem = self._host_sems.get(host)
+        if sem is None:
+            sem = self._host_sems[host] = asyncio.Semaphore(self.per_host)
+        return sem
+
+    async def request(self, method, url, timeout=None, **kwargs):
+        async with self._sem(url):
+            self.requests_sent += 1
+            return await self.client.request(method, url, timeout=timeout or timeout_for(url, self.timeout),
+                                             extensions={"trace": self.stats.async_trace(url)}, **kwargs)
+
+    async def get_json(self, url, params=None, timeout=None):
+        r = await self.request("GET", url, timeout=timeout, params=params)
+        r.raise_for_status()
+        return r.json()
+
+    async def post_json(self, url, payload, timeout=None):
+        r = await self.request("POST", url, timeout=timeout, json=payload)
+        r.raise_for_status()
+        return r.json()
+
+    async def gather(self, coros):
+        """Runs every coroutine at once; failed ones come back as None."""
+        results = await asyncio.gather(*coros, return_exceptions=True)
+        return [None if isinstance(r, BaseException) else r for r in results]
+
+    async def prewarm(self, hosts=PREWARM_HOSTS, per_host=1):
+        """Opens `per_host` connections to each host up front (TCP+TLS off the first real request)."""
+        await self.gather(self.request("HEAD", h) for h in hosts for _ in range(per_host))
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+ENGINE = AsyncHttpEngine()
+
+# --- 4. SYNC CLIENT ---
+class SyncHttp:
+    """
+    Blocking counterpart for scripts and worker threads: one thread-safe
+    httpx.Client shared by every module instead of bare requests.get/post.
+    """
+    def __init__(self, max_connections=MAX_CONNECTIONS, timeout=DEFAULT_TIMEOUT, stats=HTTP_STATS):
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.stats = stats
+        self._client = None
+        self.requests_sent = 0
+
+    @property
+    def client(self):
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.Client(limits=_limits(self.max_connections), timeout=self.timeout, http2=HTTP2)
+        return self._client
+
+    def request(self, method, url, timeout=None, **kwargs):
+        self.requests_sent += 1
+        return self.client.request(method, url, timeout=timeout or timeout_for(url, self.timeout),
+                                   extensions={"trace": self.stats.sync_trace(url)}, **kwargs)
+
+    def get(self, url, params=None, timeout=None):
+        return self.request("GET", url, timeout=timeout, params=params)
+
+    def get_json(self, url, params=None, timeout=None):
+        r = self.get(url, params=params, timeout=timeout)
+        r.raise_for_status()
+        return r.json()
+
+    def post_json(self, url, payload, timeout=None):
+        r = self.request("POST", url, timeout=timeout, json=payload)
+        r.raise_for_status()
+        return r.json()
+
+    def prewarm(self, hosts=PREWARM_HOSTS):
+        for h in hosts:
+            try: self.request("HEAD", h)
+            except Exception as e: print(f"⚠️ PREWARM {h}: {e}")
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+HTTP = SyncHttp()
+
+# --- 5. SCAN TIMER ---
+class ScanTimer:
+    """Wall-clock + request counter for one scan, so engines can be compared.
+    Requests made outside the engine (e.g. through HTTP) can be added by hand."""
+    def __init__(self, mode, engine=ENGINE):
+        self.mode = mode
+        self.engine = engine
+        self.wall = 0.0
+        self.requests = 0
+
+    def __enter__(self):
+        self._t0 = time.perf_counter()
+        self._r0 = self.engine.requests_sent
+        return self
+
+    def __exit__(self, *exc):
+        self.wall = time.perf_counter() - self._t0
+        self.finished_at = time.time()
+        self.requests += self.engine.requests_sent - self._r0
+        print(f"⏱️ SCAN [{self.mode}]: {self.wall:.2f}s wall, {self.requests} requests")
+        return False
+
+    def as_dict(self):
+        return {"mode": self.mode, "wall": round(self.wall, 3), "requests": self.requests, "at": self.finished_at}
@@ -0,0 +1,131 @@
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import httpx
+import numpy as np
+from eth_utils import keccak
+from poly_eip712_structs import make_domain
+from py_clob_client.clob_types import MarketOrderArgs, OrderType, PostOrdersArgs
+from py_clob_client.config import get_contract_config
+from py_clob_client.exceptions import PolyApiException
+from py_clob_client.order_builder.constants import SELL
+
+# --- MULTI-LEG EXECUTION ---
+class LegExecutor:
+    """
+    Submits every leg of an arb at once: one POST /orders batch. Responses
+    are matched to legs by order ID (the order's EIP-712 hash); a leg the
+    batch reply doesn't account for is looked up with GET /order rather than
+    posted again, so a lost reply can never double a fill. Only a batch that
+    never reached the server falls back to concurrent single posts. Legs are FOK,
+    so each one either fills or is killed. If some legs fill and others
+    don't, the filled legs are sold straight back (FOK market SELL of the
+    shares received) so the wallet isn't left holding one side.
+    Blocking; call it from a worker thread.
+    """
+    def __init__(self, client):
+        self.client = client
+        self._pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="leg")
+        self.gaps = deque(maxlen=500)   # seconds between the first and last leg ack (concurrent posts only)
+        self.stats = {"executions": 0, "batched": 0, "fallback": 0, "lookups": 0, "partial": 0, "unwound": 0, "unwind_failed": 0}
+
+    def order_id(self, order):
+        """The CLOB's ID for a signed order: its EIP-712 struct hash under the exchange it settles on."""
+        chain_id = self.client.chain_id
+        exchange = get_contract_config(chain_id, self.client.get_neg_risk(str(order.order['tokenId']))).exchange
+        domain = make_domain(name="Polymarket CTF Exchange", version="1", chainId=str(chain_id), verifyingContract=exchange)
+        return "0x" + keccak(order.order.signable_bytes(domain=domain)).hex()
+
+    def _lookup(self, oid):
+        """A post-style response for an order whose reply was lost, rebuilt from GET /order."""
+        self.stats["lookups"] += 1
+        try: o = self.client.get_order(oid)
+        except Exception as e: return {"success": False, "orderID": oid, "errorMsg": f"leg state unknown: {e}"}
+        matched = float((o or {}).get("size_matched") or 0)
+        if not matched: return {"success": False, "orderID": oid, "errorMsg": f"not filled ({(o or {}).get('status') or 'not found'})"}
+        return {"success": True, "orderID": oid, "status": "matched", "takingAmount": matched}
+
+    def _submit(self, orders):
+        """
+        [(resp, ack_ts)] per order, in order. ack_ts is None for batched legs:
+        they share one reply, so there is no per-leg time to compare.
+        """
+        ids = [self.order_id(o) for o in orders]
+        try:
+            resps = self.client.post_orders([PostOrdersArgs(order=o, orderType=OrderType.FOK) for o in orders])
+        except PolyApiException as e:
+            if e.status_code is None and isinstance(e.__context__, (httpx.ConnectError, httpx.ConnectTimeout)):
+                # Never reached the server, so nothing can have filled: safe to post the legs one by one
+                print(f"⚠️ BATCH POST not sent, posting legs concurrently: {e.__context__!r}")
+                self.stats["fallback"] += 1
+                def one(o):
+                    try: r = self.client.post_order(o, OrderType.FOK)
+                    except Exception as e: r = {"success": False, "errorMsg": str(e)}
+                    return r, time.perf_counter()
+                return list(self._pool.map(one, orders))
+            if e.status_code is not None and 400 <= e.status_code < 500:
+                # Rejected as a whole; no leg was placed
+                return [({"success": False, "orderID": oid, "errorMsg": str(e.error_msg)}, None) for oid in ids]
+            print(f"⚠️ BATCH POST reply lost, checking legs by ID: {e}")
+            resps = None
+        except Exception as e:
+            print(f"⚠️ BATCH POST reply lost, checking legs by ID: {e}")
+            resps = None
+        else:
+            self.stats["batched"] += 1
+        by_id = {str(r.get("orderID") or "").lower(): r for r in (resps if isinstance(resps, list) else []) if isinstance(r, dict)}
+        return [(by_id.get(oid.lower()) or self._lookup(oid), None) for oid in ids]
+
+    @staticmethod
+    def filled_shares(resp):
+        """Shares a BUY leg received (0.0 if it was killed or rejected)."""
+        if not isinstance(resp, dict) or not resp.get("success") or resp.get("status") not in ("matched", "delayed"): return 0.0
+        try: return float(resp.get("takingAmount") or 0)
+        except (TypeError, ValueError): return 0.0
+
+    def unwind(self, token_id, shares):
+        """Sells `shares` of token_id back at market. Returns '' or the error."""
+        try:
+            order = self.client.create_market_order(MarketOrderArgs(token_id=str(token_id), amount=float(shares), side=SELL))
+            resp = self.client.post_order(order, OrderType.FOK)
+            return "" if resp.get("success") else (resp.get("errorMsg") or str(resp))
+        except Exception as e:
+            return str(e)
+
+    def execute(self, tokens, orders):
+        """
+        tokens and orders line up leg for leg. Returns
+        {"ok", "error", "legs": [{"token", "shares", "error"}], "gap_ms", "unwound": [token], "stuck": [token]}.
+        gap_ms is the spread of per-leg acks when the legs were posted concurrently, None when batched.
+        """
+        self.stats["executions"] += 1
+        acks = self._submit(orders)
+        legs = [{"token": t, "shares": self.filled_shares(r), "error": "" if self.filled_shares(r) else ((r or {}).get("errorMsg") or str(r))}
+                for t, (r, _) in zip(tokens, acks)]
+        ts = [a for _, a in acks if a is not None]
+        gap = max(ts) - min(ts) if len(ts) == len(acks) else None
+        if gap is not None: self.gaps.append(gap)
+        out = {"ok": all(l['shares'] > 0 for l in legs), "error": "", "legs": legs,
+               "gap_ms": None if gap is None else round(gap * 1e3, 2), "unwound": [], "stuck": []}
+        if out['ok']: return out
+
+        out['error'] = next(l['error'] for l in legs if not l['shares'])
+        filled = [l for l in legs if l['shares'] > 0]
+        if filled:
+            # Leg risk: some sides filled, the rest were killed
+            self.stats["partial"] += 1
+            for l in filled:
+                err = self.unwind(l['token'], l['shares'])
+                if err:
+                    self.stats["unwind_failed"] += 1
+                    out['stuck'].append(l['token'])
+                    print(f"🚨 UNWIND FAILED {l['token']} ({l['shares']} sh): {err}")
+                else:
+                    self.stats["unwound"] += 1
+                    out['unwound'].append(l['token'])
+        return out
+
+    def gap_stats(self):
+        if not self.gaps: return {}
+        ms = np.array(self.gaps) * 1e3
+        return {"n": len(ms), "p50_ms": round(float(np.percentile(ms, 50)), 2), "p99_ms": round(float(np.percentile(ms, 99)), 2)}
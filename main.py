@@ -1,25 +1,50 @@
 import os
 import asyncio
 import json
+import html
 import time
-import requests
 import numpy as np
-from datetime import datetime, timezone
 from decimal import Decimal, getcontext
 from dotenv import load_dotenv
+load_dotenv()  # before the project modules below read their env config
 from eth_account import Account
 from web3 import Web3
 from web3.middleware import ExtraDataToPOAMiddleware
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup
 from telegram.ext import ApplicationBuilder, CommandHandler, CallbackQueryHandler, MessageHandler, filters
 from py_clob_client.client import ClobClient
-from py_clob_client.clob_types import MarketOrderArgs
-from py_clob_client.order_builder.constants import BUY
+from http_engine import ENGINE, HTTP, HTTP_STATS, ScanTimer
+from clob_books import fetch_books, best_ask
+from arb_math import calculate_arbitrage_guaranteed, evaluate_arbitrage_vectorized, walk_ask_ladders, profit_at_stake, evaluate_negrisk_groups, NegRiskTracker, roi_per_day
+from opportunity_snapshot import SnapshotStore, opportunity_id
+from singleflight import SingleFlight
+from book_mirror import BookMirror
+from arb_detector import ArbDetector
+from book_verify import BookVerifier
+from order_cache import PresignedOrderCache, PRESIGN_TOP_N
+from leg_executor import LegExecutor
+from clob_worker import ClobWorker
+from market_catalog import MarketCatalog, catalog_row, fetch_window_events
+from rpc_pool import RpcPool
+from view_cache import BlockViewCache
+from async_rpc import AsyncRpc
 
 # --- 1. CORE CONFIG & LATENCY SETUP ---
 getcontext().prec = 28
-load_dotenv()
-ARBI_CACHE = []
+SNAPSHOTS = SnapshotStore(keep=64)  # published scans + live folds; read SNAPSHOTS.current, never mutate it
+SCAN_FLIGHT = SingleFlight()
+BOOK_MIRROR = BookMirror() if os.getenv("BOOK_MIRROR", "1") != "0" else None
+DETECTOR = ArbDetector(BOOK_MIRROR) if BOOK_MIRROR else None
+VERIFIER = BookVerifier(BOOK_MIRROR) if BOOK_MIRROR and os.getenv("BOOK_VERIFY", "1") != "0" else None
+SCAN_ENGINE = os.getenv("SCAN_ENGINE", "async").lower()  # "async" or "sequential" (baseline)
+SCAN_DISCOVERY = os.getenv("SCAN_DISCOVERY", "catalog").lower()  # "catalog", "window" or "tags"
+SCAN_INTERVAL = int(os.getenv("SCAN_INTERVAL", 30))  # seconds between background rescans (0 = off)
+SCAN_MAX_AGE = float(os.getenv("SCAN_MAX_AGE", 120))  # the button rescans inline when the last scan is older than this
+PRESIGN_INTERVAL = float(os.getenv("PRESIGN_INTERVAL", 2))  # seconds between pre-signing passes (0 = off)
+LIVE_PUBLISH_INTERVAL = float(os.getenv("LIVE_PUBLISH_INTERVAL", 2))  # detector -> SNAPSHOTS at most this often
+LIVE_TOP_N = 50
+DEFAULT_STAKE = 50.0
+CATALOG = MarketCatalog()
 
 # POLYGON ADDRESSES
 USDC_E = Web3.to_checksum_address("0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174")
@@ -30,20 +55,20 @@ LOGO = """<pre> █████╗ ██████╗ ███████
 
 # --- 2. HYDRA ENGINE & ABIs ---
 def get_hydra_w3():
-    endpoints = [os.getenv("RPC_URL"), "https://polygon-rpc.com", "https://1rpc.io/matic"]
-    for url in endpoints:
-        if not url: continue
-        try:
-            _w3 = Web3(Web3.HTTPProvider(url.strip(), request_kwargs={'timeout': 10}))
-            if _w3.is_connected():
-                _w3.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
-                return _w3
-        except: continue
-    return None
+    """Web3 over the latency-ranked, hedged RPC pool (see rpc_pool.py); None if no endpoint answers."""
+    try:
+        pool = RpcPool()
+        if not pool.start(): return None
+        _w3 = Web3(pool)
+        _w3.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
+        return _w3
+    except: return None
 
 w3 = get_hydra_w3()
 if not w3:
     print("FATAL: RPC Failure."); import sys; sys.exit(1)
+ASYNC_RPC = AsyncRpc(pool=w3.provider)  # handlers await RPC through this; w3 stays for scripts/threads
+VIEW_CACHE = BlockViewCache()           # view results for the current block
 
 ERC20_ABI = [
     {"constant": True, "inputs": [{"name": "_owner", "type": "address"}], "name": "balanceOf", "outputs": [{"name": "balance", "type": "uint256"}], "type": "function"},
@@ -86,73 +111,342 @@ def init_clob():
         return None
 
 clob_client = init_clob()
+CLOB_WORKER = ClobWorker(clob_client)  # every ClobClient call goes through here, never on the event loop
+PRESIGNED = PresignedOrderCache(clob_client, worker=CLOB_WORKER)
+LEG_EXEC = LegExecutor(clob_client)
 
 # --- 4. MATH ---
-def calculate_arbitrage_guaranteed(p_yes, p_no, total_capital):
-    combined_prob = p_yes + p_no
-    if combined_prob <= 0 or combined_prob >= 1.0: return None
-    stake_yes = (p_no / combined_prob) * total_capital
-    stake_no = (p_yes / combined_prob) * total_capital
-    if stake_yes < 1.0 or stake_no < 1.0: return None
-    expected_payout = (stake_yes / p_yes)
-    profit = expected_payout - total_capital
-    roi = (profit / total_capital) * 100
-    return {"stake_yes": round(stake_yes, 2), "stake_no": round(stake_no, 2), "profit": round(profit, 2), "roi": round(roi, 2), "eff": round(combined_prob, 4)}
-
-async def fetch_full_market(cond_id):
-    try:
-        url = f"https://clob.polymarket.com/markets/{cond_id}"
-        r = await asyncio.to_thread(requests.get, url, timeout=5)
-        d = r.json()
-        return {t['outcome'].upper(): {"id": t['token_id'], "price": float(t['price'])} for t in d.get('tokens', [])}
-    except: return None
-
-async def scour_arbitrage():
-    global ARBI_CACHE
-    ARBI_CACHE = []
+def arb_entry(c, m_data, roi, eff, now_ts, roi_day=None):
+    days_left = round((c['end_ts'] - now_ts) / (24 * 3600), 1)
+    return {
+        "title": f"[{max(0, days_left)}d] " + c['event_title'][:25],
+        "yes_id": m_data['YES']['id'], "no_id": m_data['NO']['id'],
+        "p_y": m_data['YES']['price'], "p_n": m_data['NO']['price'], "roi": roi, "eff": eff, "ends": c['end_date'],
+        "roi_day": roi_per_day(roi, c['end_ts'], now_ts) if roi_day is None else roi_day,
+        "d_y": m_data['YES'].get('size'), "d_n": m_data['NO'].get('size'),
+        "asks_y": m_data['YES'].get('asks'), "asks_n": m_data['NO'].get('asks')
+    }
+
+def build_arb_entry(c, m_data, now_ts):
+    """c is a catalog row (see market_catalog.catalog_row)."""
+    if not m_data or 'YES' not in m_data or 'NO' not in m_data: return None
+    arb = calculate_arbitrage_guaranteed(m_data['YES']['price'], m_data['NO']['price'], 100.0)
+    if not arb: return None
+    return arb_entry(c, m_data, arb['roi'], arb['eff'], now_ts)
+
+def build_arb_entries(priced, now_ts):
+    """Vectorized build_arb_entry over [(catalog_row, m_data)] in one NumPy pass."""
+    if not priced: return []
+    p_y = np.array([m['YES']['price'] for _, m in priced])
+    p_n = np.array([m['NO']['price'] for _, m in priced])
+    days = np.array([(c['end_ts'] - now_ts) / (24 * 3600) for c, _ in priced])
+    # Shares resting at each best ask; markets too thin to fill $1 a side drop out
+    d_y = np.array([m['YES'].get('size') or np.inf for _, m in priced])
+    d_n = np.array([m['NO'].get('size') or np.inf for _, m in priced])
+    arb = evaluate_arbitrage_vectorized(p_y, p_n, 100.0, days_left=days, depth_yes=d_y, depth_no=d_n)
+    return [arb_entry(priced[i][0], priced[i][1], float(arb['roi'][i]), float(arb['eff'][i]), now_ts, roi_day=float(arb['roi_per_day'][i]))
+            for i in np.flatnonzero(arb['valid'])]
+
+def negrisk_groups(candidates):
+    """
+    Leg lists for every negRisk event that has at least one market in the scan.
+    Only events whose discovery attached a complete list ('event_legs') are
+    grouped: with a leg missing, YES on the rest isn't risk-free.
+    """
+    groups = {c['event_id']: c['event_legs'] for c in candidates if c.get('neg_risk') and c.get('event_legs')}
+    return {e: rows for e, rows in groups.items() if len(rows) > 2 and all(r['yes_token'] for r in rows)}
+
+def attach_event_legs(candidates, groups):
+    """Hands each negRisk candidate its event's complete, open leg list."""
+    for c in candidates:
+        if c.get('neg_risk') and c['event_id'] in groups: c['event_legs'] = groups[c['event_id']]
+    return candidates
+
+def build_negrisk_entries(groups, books, now_ts):
+    """One vectorized N-leg pass over every negRisk group (sum of best YES asks < 1)."""
+    if not groups: return []
+    tracker = NegRiskTracker({e: [r['yes_token'] for r in rows] for e, rows in groups.items()})
+    asks = [best_ask(books.get(str(t))) or (1.0, 0.0) for t in tracker.tokens]
+    tracker.load([a[0] for a in asks], [a[1] for a in asks])
+    sizes = {str(t): a[1] for t, a in zip(tracker.tokens, asks)}
+    entries = []
+    for arb in tracker.arbs(100.0):
+        rows = groups[arb['group']]
+        end_ts = max(r['end_ts'] or 0 for r in rows)
+        days_left = round((end_ts - now_ts) / (24 * 3600), 1)
+        entries.append({
+            "kind": "negrisk", "title": f"[{max(0, days_left)}d] NR{len(rows)} " + rows[0]['event_title'][:20],
+            "legs": [{"id": l['id'], "price": l['price'], "size": sizes.get(str(l['id']))} for l in arb['legs']],
+            "roi": arb['roi'], "eff": round(arb['sum'], 4), "ends": max(rows, key=lambda r: r['end_ts'] or 0)['end_date'],
+            "roi_day": roi_per_day(arb['roi'], end_ts, now_ts)
+        })
+    return entries
+
+def pair_fill(target, stake):
+    """
+    Equal YES and NO shares for a pair at the given stake. Walks both ask
+    ladders when the entry has them (stake capped where profit peaks), else
+    prices the whole stake at the best asks. None if there is no spread.
+    """
+    curve = walk_ask_ladders(target['asks_y'], target['asks_n']) if target.get('asks_y') and target.get('asks_n') else None
+    if curve:
+        fill = profit_at_stake(curve, stake)
+    else:
+        combined = target['p_y'] + target['p_n']
+        if combined <= 0 or combined >= 1.0: return None
+        shares = stake / combined
+        fill = {"stake": round(stake, 2), "shares": round(shares, 2), "profit": round(shares - stake, 2),
+                "stake_yes": round(shares * target['p_y'], 2), "stake_no": round(shares * target['p_n'], 2),
+                "cap_yes": target['p_y'], "cap_no": target['p_n']}
+    if fill['stake_yes'] < 1.0 or fill['stake_no'] < 1.0: return None
+    fill['roi'] = round(100.0 * fill['profit'] / fill['stake'], 2)
+    fill['curve'] = curve
+    return fill
+
+def order_legs(target, stake):
+    """[(token_id, usd_amount)] to buy for a cached opportunity at the given stake."""
+    if target.get('kind') == 'negrisk':
+        prices = [l['price'] for l in target['legs']]
+        res = evaluate_negrisk_groups(prices, [0], stake)
+        if not res['valid'][0]: return []
+        return [(l['id'], float(a)) for l, a in zip(target['legs'], res['leg_stakes'])]
+    fill = pair_fill(target, stake)
+    if not fill: return []
+    return [(target['yes_id'], fill['stake_yes']), (target['no_id'], fill['stake_no'])]
+
+def live_target(target):
+    """Copy of an entry with each leg's ask (and pair ask ladders) refreshed from the mirror where its book is live."""
+    if not BOOK_MIRROR: return target
+    ask = lambda t, p: (BOOK_MIRROR.best_ask(t) or (p,))[0] if BOOK_MIRROR.is_live(t) else p
+    if target.get('kind') == 'negrisk':
+        return dict(target, legs=[dict(l, price=ask(l['id'], l['price'])) for l in target['legs']])
+    live = dict(target, p_y=ask(target['yes_id'], target['p_y']), p_n=ask(target['no_id'], target['p_n']))
+    if BOOK_MIRROR.is_live(target['yes_id']) and BOOK_MIRROR.is_live(target['no_id']):
+        live['asks_y'] = BOOK_MIRROR.book(target['yes_id']).ask_ladder()
+        live['asks_n'] = BOOK_MIRROR.book(target['no_id']).ask_ladder()
+    return live
+
+def priced_legs(target, stake):
+    """
+    order_legs plus each leg's price cap: [(token_id, usd, price)]. Pair legs
+    are capped at the deepest ask the equal-share fill reaches.
+    """
+    if target.get('kind') == 'negrisk':
+        prices = {str(l['id']): l['price'] for l in target['legs']}
+        return [(t, amt, prices[str(t)]) for t, amt in order_legs(target, stake)]
+    fill = pair_fill(target, stake)
+    if not fill: return []
+    return [(target['yes_id'], fill['stake_yes'], fill['cap_yes']), (target['no_id'], fill['stake_no'], fill['cap_no'])]
+
+def market_from_books(c, books):
+    """Prices a YES/NO pair off the best asks from a batched /books fetch."""
+    m_data = {}
+    for side, t_id in (('YES', c['yes_token']), ('NO', c['no_token'])):
+        book = books.get(str(t_id))
+        ask = best_ask(book)
+        if not ask: return None
+        asks = [(float(a['price']), float(a['size'])) for a in book['asks']]
+        m_data[side] = {"id": t_id, "price": ask[0], "size": ask[1], "asks": asks}
+    return m_data
+
+def in_scan_window(c, now_ts, limit_ts):
+    if c['outcome_count'] != 2 or not c['yes_token'] or not c['no_token']: return False
+    return c['end_ts'] is not None and now_ts < c['end_ts'] <= limit_ts
+
+async def fetch_scan_tags():
     # Dynamic fetching of top 100 tags to cast a wider net
     try:
-        tag_resp = await asyncio.to_thread(requests.get, "https://gamma-api.polymarket.com/tags?limit=100", timeout=5)
-        tags = [t['id'] for t in tag_resp.json()]
+        return [t['id'] for t in await ENGINE.get_json("https://gamma-api.polymarket.com/tags?limit=100")]
     except:
-        tags = [1, 10, 100, 4, 6, 237]
-        
-    now_ts = time.time()
-    limit_ts = now_ts + (3 * 24 * 60 * 60)
-    seen_markets = set()
+        return [1, 10, 100, 4, 6, 237]
+
+async def discover_tags(now_ts, limit_ts):
+    """Live crawl: 20 events for each of the top 100 tags, all requested at once."""
+    tags = await fetch_scan_tags()
+    tag_urls = [f"https://gamma-api.polymarket.com/events?active=true&closed=false&limit=20&tag_id={tag}" for tag in tags]
+    tag_events = await ENGINE.gather(ENGINE.get_json(u) for u in tag_urls)
+    candidates, legs = {}, {}
+    for events in tag_events:
+        for e in events or []:
+            rows = [catalog_row(m, e) for m in e.get('markets', [])]
+            for c in rows:
+                if c['condition_id'] and in_scan_window(c, now_ts, limit_ts):
+                    candidates.setdefault(c['condition_id'], c)
+            # An event lists all of its markets, so this is the full negRisk leg set
+            if any(c['neg_risk'] for c in rows):
+                legs[str(e.get('id') or '')] = [c for c in rows if c['condition_id'] and c['active'] and not c['closed']]
+    await asyncio.to_thread(CATALOG.upsert, list(candidates.values()))
+    return attach_event_legs(list(candidates.values()), legs)
+
+async def discover_catalog(now_ts, limit_ts):
+    """Delta-syncs the local catalog, then reads the 3-day window from disk."""
+    try: await CATALOG.sync()
+    except Exception as e: print(f"⚠️ CATALOG SYNC FAILED (using last copy): {e}")
+    candidates = [c for c in CATALOG.window(now_ts, limit_ts) if in_scan_window(c, now_ts, limit_ts)]
+    # The catalog holds every open market only once a full sync has landed
+    if CATALOG.last_sync() is None: return candidates
+    return attach_event_legs(candidates, CATALOG.event_markets({c['event_id'] for c in candidates if c['neg_risk']}))
+
+async def discover_window(now_ts, limit_ts):
+    """
+    Asks Gamma for exactly the 3-day window (server-side end-date filter), one
+    row per market. An event's legs outside the window aren't seen, so no
+    negRisk groups come out of this mode.
+    """
+    events = await fetch_window_events(now_ts, limit_ts)
+    candidates = [catalog_row(m, e) for e, markets in events.values() for m in markets]
+    candidates = [c for c in candidates if c['condition_id'] and in_scan_window(c, now_ts, limit_ts)]
+    await asyncio.to_thread(CATALOG.upsert, candidates)
+    print(f"🪟 WINDOW: {len(events)} events, {len(candidates)} binary markets")
+    return candidates
+
+DISCOVERY = {"catalog": discover_catalog, "tags": discover_tags, "window": discover_window}
+
+async def fetch_books_mirrored(tokens):
+    """Live mirrored books where we have them, one batched REST sweep for the rest."""
+    tokens = [str(t) for t in tokens]
+    books = {}
+    if BOOK_MIRROR:
+        books = {t: BOOK_MIRROR.book(t).as_rest_book(t) for t in tokens if BOOK_MIRROR.is_live(t)}
+        BOOK_MIRROR.subscribe(tokens)
+        BOOK_MIRROR.prune()  # markets that expired or closed have left the scan window
+    books.update(await fetch_books(t for t in tokens if t not in books))
+    return books
+
+def entry_tokens(e):
+    return [l['id'] for l in e['legs']] if e.get('legs') else [e['yes_id'], e['no_id']]
+
+def publish_live():
+    """
+    Folds the detector's live opportunities into a new snapshot. Where every
+    leg's book is live in the mirror the detector is fresher than the last
+    scan, so its version replaces the scan's entry, and a scan entry it no
+    longer considers live is dropped. Otherwise the scan's REST-priced entry
+    stands.
+    """
+    global LIVE_PUBLISH
+    LIVE_PUBLISH = None
+    snap = SNAPSHOTS.current
+    live = {opportunity_id(o): o for o in DETECTOR.top(LIVE_TOP_N) if all(BOOK_MIRROR.is_live(t) for t in entry_tokens(o))}
+    live_ids = {opportunity_id(o) for o in DETECTOR.live.values()}
+    entries = []
+    for e in snap.items:
+        if e['id'] in live: continue  # the detector's copy below is fresher
+        if e['id'] not in live_ids and all(BOOK_MIRROR.is_live(t) for t in entry_tokens(e)): continue  # spread gone on the live books
+        entries.append(e)
+    entries += live.values()
+    entries.sort(key=lambda x: -x['roi_day'])
+    SNAPSHOTS.publish(entries, dict(snap.scan, live=len(live)))
+
+LIVE_PUBLISH = None
+
+def schedule_live_publish(key, opp):
+    """Detector hook: coalesces bursts of book updates into one publish per LIVE_PUBLISH_INTERVAL."""
+    global LIVE_PUBLISH
+    if LIVE_PUBLISH is None and SNAPSHOTS.current.version:
+        LIVE_PUBLISH = asyncio.get_running_loop().call_later(LIVE_PUBLISH_INTERVAL, publish_live)
+
+if DETECTOR: DETECTOR.on_emit = schedule_live_publish
 
-    for tag in tags:
-        url = f"https://gamma-api.polymarket.com/events?active=true&closed=false&limit=20&tag_id={tag}"
+async def scour_arbitrage():
+    """Concurrent scan: discover candidates, then one batched /books sweep prices all of them."""
+    with ScanTimer(f"async/{SCAN_DISCOVERY}") as timer:
+        now_ts = time.time()
+        limit_ts = now_ts + (3 * 24 * 60 * 60)
+        candidates = await DISCOVERY.get(SCAN_DISCOVERY, discover_catalog)(now_ts, limit_ts)
+        groups = negrisk_groups(candidates)
+        if DETECTOR: DETECTOR.register(candidates, groups)
+
+        tokens = [t for c in candidates for t in (c['yes_token'], c['no_token'])]
+        tokens += [r['yes_token'] for rows in groups.values() for r in rows]
+        books = await fetch_books_mirrored(tokens)
+        priced = [(c, market_from_books(c, books)) for c in candidates]
+        cache = build_arb_entries([(c, m) for c, m in priced if m], now_ts)
+        cache += build_negrisk_entries(groups, books, now_ts)
+        cache.sort(key=lambda x: -x['roi_day'])  # best return per day of capital lock-up first
+    return len(SNAPSHOTS.publish(cache, dict(timer.as_dict(), at=time.time())).items) > 0
+
+async def scour_arbitrage_sequential():
+    """Original one-request-at-a-time crawl, kept as the baseline for SCAN_ENGINE=sequential."""
+    cache = []
+    with ScanTimer("sequential") as timer:
         try:
-            resp = await asyncio.to_thread(requests.get, url, timeout=5)
-            for e in resp.json():
-                for m in e.get('markets', []):
-                    cond_id = m.get('conditionId')
-                    if not cond_id or cond_id in seen_markets: continue
-                    if len(m.get('outcomePrices', [])) != 2: continue
-                    
-                    end_date_str = m.get('endDate')
-                    if not end_date_str: continue
-                    end_dt = datetime.fromisoformat(end_date_str.replace('Z', '+00:00'))
-                    
-                    if now_ts < end_dt.timestamp() <= limit_ts:
-                        m_data = await fetch_full_market(cond_id)
-                        if m_data and 'YES' in m_data and 'NO' in m_data:
-                            py, pn = m_data['YES']['price'], m_data['NO']['price']
-                            arb = calculate_arbitrage_guaranteed(py, pn, 100.0)
-                            if arb:
-                                days_left = round((end_dt.timestamp() - now_ts) / (24 * 3600), 1)
-                                ARBI_CACHE.append({
-                                    "title": f"[{max(0, days_left)}d] " + e.get('title')[:25],
-                                    "yes_id": m_data['YES']['id'], "no_id": m_data['NO']['id'],
-                                    "p_y": py, "p_n": pn, "roi": arb['roi'], "eff": arb['eff'], "ends": end_date_str
-                                })
+            timer.requests += 1
+            tag_resp = await asyncio.to_thread(HTTP.get, "https://gamma-api.polymarket.com/tags?limit=100")
+            tags = [t['id'] for t in tag_resp.json()]
+        except:
+            tags = [1, 10, 100, 4, 6, 237]
+
+        now_ts = time.time()
+        limit_ts = now_ts + (3 * 24 * 60 * 60)
+        seen_markets = set()
+
+        for tag in tags:
+            url = f"https://gamma-api.polymarket.com/events?active=true&closed=false&limit=20&tag_id={tag}"
+            try:
+                timer.requests += 1
+                resp = await asyncio.to_thread(HTTP.get, url)
+                for e in resp.json():
+                    for m in e.get('markets', []):
+                        c = catalog_row(m, e)
+                        cond_id = c['condition_id']
+                        if not cond_id or cond_id in seen_markets: continue
+                        if in_scan_window(c, now_ts, limit_ts):
+                            timer.requests += 1
+                            r = await asyncio.to_thread(HTTP.get, f"https://clob.polymarket.com/markets/{cond_id}")
+                            m_data = {t['outcome'].upper(): {"id": t['token_id'], "price": float(t['price'])} for t in r.json().get('tokens', [])}
+                            entry = build_arb_entry(c, m_data, now_ts)
+                            if entry:
+                                cache.append(entry)
                                 seen_markets.add(cond_id)
-        except: continue
-    ARBI_CACHE.sort(key=lambda x: x['eff'])
-    return len(ARBI_CACHE) > 0
+            except: continue
+        cache.sort(key=lambda x: -x['roi_day'])  # best return per day of capital lock-up first
+    return len(SNAPSHOTS.publish(cache, dict(timer.as_dict(), at=time.time())).items) > 0
+
+async def run_scan():
+    """Every caller (buttons, background job) shares whichever scan is already running."""
+    scan = scour_arbitrage_sequential if SCAN_ENGINE == "sequential" else scour_arbitrage
+    return await SCAN_FLIGHT.do("scan", scan)
+
+async def background_scan(context):
+    """JobQueue tick: keeps SNAPSHOTS warm so the button never waits on a crawl."""
+    try: await run_scan()
+    except Exception as e: print(f"⚠️ BACKGROUND SCAN FAILED: {e}")
+
+async def presign_orders(context):
+    """JobQueue tick: keeps signed orders ready for the top opportunities at every stake users have set."""
+    stakes = {round(float(d.get('stake', DEFAULT_STAKE)), 2) for d in context.application.user_data.values()}
+    stakes.add(DEFAULT_STAKE)
+    wanted = {}
+    for opp in SNAPSHOTS.current.items[:PRESIGN_TOP_N]:
+        live = live_target(opp)
+        for s in stakes: wanted[(opp['id'], s)] = priced_legs(live, s)
+    try: await PRESIGNED.refresh(wanted)
+    except Exception as e: print(f"⚠️ PRESIGN PASS FAILED: {e}")
 
 # --- 5. BOT HANDLERS ---
+def render_scan():
+    """Latest published scan as edit_text/reply_text kwargs, stamped with its age."""
+    snap = SNAPSHOTS.current
+    flight = SCAN_FLIGHT.stats()
+    took = (f"\n<i>⏱️ {snap.age or 0:.0f}s old · v{snap.version} · scan took {snap.scan.get('wall', 0):.2f}s ({snap.scan.get('mode')})"
+            f"\n🔁 scans: {flight['fresh']} fresh / {flight['coalesced']} coalesced")
+    if DETECTOR:
+        lat = DETECTOR.latency_stats()
+        took += f"\n⚡ live: {len(DETECTOR.live)} arbs · detect p50 {lat.get('p50_us', 0):.0f}µs / p99 {lat.get('p99_us', 0):.0f}µs"
+    if VERIFIER:
+        v = VERIFIER.stats
+        took += f"\n🧾 books: {v['verified']} verified · {v['mismatches']} mismatches · {v['resyncs']} resyncs"
+    lag = CLOB_WORKER.lag_stats()
+    if lag: took += f"\n🫀 loop lag p99 {lag['p99_ms']:.1f}ms · {CLOB_WORKER.inflight} CLOB calls in flight"
+    reuse = HTTP_STATS.overall()
+    if reuse is not None: took += f"\n🔌 HTTP connection reuse {reuse:.0f}%"
+    took += "</i>"
+    if snap.items:
+        kb = [[InlineKeyboardButton(f"{a['title']} ({a['roi']}%)", callback_data=f"ARB_{snap.version}_{a['id']}")] for a in snap.items[:10]]
+        return {"text": "<b>STRICT PROFIT OPPORTUNITIES:</b>" + took, "reply_markup": InlineKeyboardMarkup(kb), "parse_mode": 'HTML'}
+    return {"text": "⚠️ <b>NO PURE ARBS FOUND (SUM < 1.0).</b>" + took, "parse_mode": 'HTML'}
+
 async def start(update, context):
     btns = [['🚀 START ARBI-SCAN', '⚙️ CALIBRATE'], ['🏦 VAULT', '🔧 FIX APPROVAL']]
     welcome_text = (f"{LOGO}\n<b>HYDRA ARBITRAGE SYSTEM ONLINE</b>")
@@ -161,64 +455,126 @@ async def start(update, context):
 async def main_handler(update, context):
     cmd = update.message.text
     if 'START ARBI-SCAN' in cmd:
-        m = await update.message.reply_text("🔍 <b>SCANNING 100 CATEGORIES...</b>", parse_mode='HTML')
-        if await scour_arbitrage():
-            kb = [[InlineKeyboardButton(f"{a['title']} ({a['roi']}%)", callback_data=f"ARB_{i}")] for i, a in enumerate(ARBI_CACHE[:10])]
-            await m.edit_text("<b>STRICT PROFIT OPPORTUNITIES:</b>", reply_markup=InlineKeyboardMarkup(kb), parse_mode='HTML')
+        snap = SNAPSHOTS.current
+        if not snap.version or SCAN_INTERVAL <= 0 or time.time() - snap.scan.get('at', 0) > SCAN_MAX_AGE:
+            # Cold start, background scanning off, or the last scan is too old to show
+            m = await update.message.reply_text("🔍 <b>SCANNING 100 CATEGORIES...</b>", parse_mode='HTML')
+            try:
+                await run_scan()
+            except Exception as e:
+                print(f"⚠️ SCAN FAILED: {e}")
+                err = f"❌ <b>SCAN FAILED</b>\n<code>{html.escape(str(e))}</code>"
+                if not SNAPSHOTS.current.version:
+                    await m.edit_text(err, parse_mode='HTML')
+                    return
+                view = render_scan()
+                await m.edit_text(**dict(view, text=err + "\nShowing the last scan.\n\n" + view['text']))
+                return
+            await m.edit_text(**render_scan())
         else:
-            await m.edit_text("⚠️ <b>NO PURE ARBS FOUND (SUM < 1.0).</b>")
+            await update.message.reply_text(**render_scan())
     elif 'VAULT' in cmd:
-        bal = usdc_e_contract.functions.balanceOf(vault.address).call() / 1e6
-        aave_data = aave_pool_contract.functions.getUserAccountData(vault.address).call()
-        msg = f"<b>VAULT</b>\nAddr: <code>{vault.address}</code>\nBal: ${bal:.2f}\nAave Credit: ${aave_data[2]/1e8:.2f}"
+        # Both reads in one Multicall3 eth_call (none at all if already read this block)
+        views = await VIEW_CACHE.read(await ASYNC_RPC.w3(), {
+            "bal": usdc_e_contract.functions.balanceOf(vault.address),
+            "aave": aave_pool_contract.functions.getUserAccountData(vault.address),
+        })
+        bal = views["bal"] / 1e6
+        msg = f"<b>VAULT</b>\nAddr: <code>{vault.address}</code>\nBal: ${bal:.2f}\nAave Credit: ${views['aave'].availableBorrowsBase/1e8:.2f}"
+        rpc = w3.provider.endpoint_stats()[0]
+        msg += f"\n<i>RPC: {rpc['url'].split('//')[-1][:30]} · p95 {rpc['p95_ms']}ms · block {views.block} · cache hit {VIEW_CACHE.hit_rate()}%</i>"
         await update.message.reply_text(msg, parse_mode='HTML')
 
+def resolve_callback(data):
+    """
+    ARB_/EXE_<version>_<id> -> ("<version>_<id>", entry as the user saw it, or None).
+    Live folds publish every few seconds, so once that version has aged out of
+    the history the same stable ID in the current snapshot stands in for it
+    (EXE re-prices from the mirror either way).
+    """
+    try:
+        _, version, opp_id = data.split("_", 2)
+        return f"{version}_{opp_id}", SNAPSHOTS.resolve(int(version), opp_id) or SNAPSHOTS.current.by_id.get(opp_id)
+    except ValueError:
+        return None, None
+
 async def handle_query(update, context):
+    click_ts = time.perf_counter()
     q = update.callback_query; await q.answer()
-    stake = float(context.user_data.get('stake', 50))
+    stake = float(context.user_data.get('stake', DEFAULT_STAKE))
     
-    if "ARB_" in q.data:
-        idx = int(q.data.split("_")[1])
-        target = ARBI_CACHE[idx]
-        calc = calculate_arbitrage_guaranteed(target['p_y'], target['p_n'], stake)
-        msg = f"<b>PLAN:</b> {target['title']}\nROI: {calc['roi']}%\nYES: ${calc['stake_yes']}\nNO: ${calc['stake_no']}"
-        await q.edit_message_text(msg, reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("⚡ EXECUTE", callback_data=f"EXE_{idx}")]]), parse_mode='HTML')
-        
-    elif "EXE_" in q.data:
-        target = ARBI_CACHE[int(q.data.split("_")[1])]
-        calc = calculate_arbitrage_guaranteed(target['p_y'], target['p_n'], stake)
-        err_msg = ""
-        
-        # FIX: We remove manual attribute injection (setattr) which breaks the signature hash.
-        # We pass only necessary arguments to MarketOrderArgs and let the client sign naturally.
-        for (t_id, amt) in [(target['yes_id'], calc['stake_yes']), (target['no_id'], calc['stake_no'])]:
-            try:
-                # Market orders in the CLOB SDK only require token_id, amount, and side.
-                order_args = MarketOrderArgs(
-                    token_id=str(t_id), 
-                    amount=float(amt), 
-                    side=BUY
-                )
-                
-                # Use the client to create the signed order and then post it.
-                signed_order = clob_client.create_order(order_args)
-                resp = clob_client.post_order(signed_order)
-                
-                if not resp.get("success"):
-                    err_msg = resp.get("errorMsg") or str(resp)
-                    break
-            except Exception as e:
-                err_msg = str(e)
-                break
+    if q.data.startswith(("ARB_", "EXE_")):
+        key, target = resolve_callback(q.data)
+        if target is None:
+            await q.edit_message_text("⌛ <b>OPPORTUNITY EXPIRED</b>\nPress START ARBI-SCAN for fresh prices.", parse_mode='HTML')
+            return
+
+    if q.data.startswith("ARB_"):
+        if target.get('kind') == 'negrisk':
+            legs = order_legs(target, stake)
+            msg = f"<b>PLAN (NEG-RISK {len(target['legs'])} LEGS):</b> {target['title']}\nROI: {target['roi']}%\nSum of asks: {target['eff']}\n"
+            msg += "\n".join(f"• ${amt:.2f} @ {l['price']}" for l, (_, amt) in zip(target['legs'], legs))
+            await q.edit_message_text(msg, reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("⚡ EXECUTE", callback_data=f"EXE_{key}")]]), parse_mode='HTML')
+            return
+        fill = pair_fill(target, stake)
+        if not fill:
+            await q.edit_message_text("⌛ <b>SPREAD CLOSED</b>\nAsks now sum to 1.0 or more at this stake.", parse_mode='HTML')
+            return
+        capped = f" (of ${stake:.2f}, book depth)" if fill['stake'] < stake - 0.005 else ""
+        msg = (f"<b>PLAN:</b> {target['title']}\nStake: ${fill['stake']:.2f}{capped}\nROI: {fill['roi']}%"
+               f"\nYES: ${fill['stake_yes']:.2f} @ ≤{fill['cap_yes']}\nNO: ${fill['stake_no']:.2f} @ ≤{fill['cap_no']}"
+               f"\n{fill['shares']} pairs, +${fill['profit']:.2f}")
+        curve = fill['curve']
+        if curve:
+            msg += (f"\n\n<b>BOOK DEPTH:</b>\nMax Size: ${curve['best_stake']:.2f} (+${curve['best_profit']:.2f})"
+                    f"\nBreak-even Size: ${curve['max_stake']:.2f}")
+        await q.edit_message_text(msg, reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("⚡ EXECUTE", callback_data=f"EXE_{key}")]]), parse_mode='HTML')
         
+    elif q.data.startswith("EXE_"):
+        # Legs are re-priced from the mirror; a pre-signed set is used only if it still matches them
+        legs = priced_legs(live_target(target), stake)
+        orders = PRESIGNED.take(target['id'], stake, legs)
+        presigned = orders is not None
+        res = None
+        try:
+            if not legs:
+                err_msg = "Spread closed: asks now sum to 1.0 or more"
+            else:
+                if orders is None: orders = await CLOB_WORKER.run(PRESIGNED.sign_legs, legs)
+                # All legs go out together; a one-sided fill is sold back inside execute()
+                res = await CLOB_WORKER.run(LEG_EXEC.execute, [t for t, _, _ in legs], orders)
+                err_msg = res['error']
+        except Exception as e:
+            err_msg = str(e)
+        PRESIGNED.record(click_ts, presigned)
+        ack_ms = PRESIGNED.latency[-1][0] * 1e3
+
         status = "✅ <b>ARBITRAGE SECURED</b>" if not err_msg else f"❌ <b>EXE ERROR</b>\n<code>{err_msg}</code>"
+        if res and res['unwound']: status += f"\n↩️ Unwound {len(res['unwound'])} filled leg(s)"
+        if res and res['stuck']: status += f"\n🚨 <b>UNHEDGED:</b> {len(res['stuck'])} leg(s) could not be sold back"
+        status += f"\n<i>⏱️ click→ack {ack_ms:.0f}ms ({'pre-signed' if presigned else 'signed on click'})"
+        if res and res['gap_ms'] is not None: status += f" · leg gap {res['gap_ms']:.1f}ms (concurrent posts)"
+        elif res: status += " · legs batched"
+        status += "</i>"
         await context.bot.send_message(q.message.chat_id, status, parse_mode='HTML')
 
+async def on_startup(app):
+    if BOOK_MIRROR: BOOK_MIRROR.start()
+    app.bot_data['loop_watch'] = asyncio.ensure_future(CLOB_WORKER.watch_loop())
+    app.bot_data['head_watch'] = asyncio.ensure_future(VIEW_CACHE.watch(ASYNC_RPC.w3))
+    # TCP+TLS to the CLOB and Gamma is paid here, not by the first scan or click
+    await ENGINE.prewarm()
+    await asyncio.to_thread(HTTP.prewarm)
+
 if __name__ == "__main__":
-    app = ApplicationBuilder().token(os.getenv("TELEGRAM_BOT_TOKEN")).build()
+    app = ApplicationBuilder().token(os.getenv("TELEGRAM_BOT_TOKEN")).post_init(on_startup).build()
     app.add_handler(CommandHandler("start", start))
     app.add_handler(CallbackQueryHandler(handle_query))
     app.add_handler(MessageHandler(filters.TEXT & (~filters.COMMAND), main_handler))
+    if SCAN_INTERVAL > 0:
+        app.job_queue.run_repeating(background_scan, interval=SCAN_INTERVAL, first=1)
+    if PRESIGN_INTERVAL > 0 and PRESIGN_TOP_N > 0:
+        app.job_queue.run_repeating(presign_orders, interval=PRESIGN_INTERVAL, first=5)
     print("Hydra v230 Active...")
     app.run_polling()
 
@@ -1,21 +1,24 @@
 import os, subprocess, time
 from dotenv import load_dotenv
+load_dotenv()  # before the project modules below read their env config
 from web3 import Web3
 from eth_account import Account
+from multicall import ViewBatch
+from nonce_manager import NonceManager
+from fee_oracle import FeeOracle
 
 # --- CONFIG ---
-load_dotenv()
 CTF_EXCHANGE = Web3.to_checksum_address("0x4bFbE613d03C895dB366BC36B3D966A488007284")
 USDC_NATIVE = Web3.to_checksum_address("0x3c499c542cEF5E3811e1192ce70d8cC03d5c3359")
 RPC_URL = os.getenv("RPC_URL", "https://polygon-rpc.com")
 SEED = os.getenv("WALLET_SEED")
 
 # Minimal ABI for silent check
-ABI = '[{"constant":false,"inputs":[{"name":"_spender","type":"address"},{"name":"_value","type":"uint256"}],"name":"approve","outputs":[{"name":"success","bool"}],"type":"function"},{"constant":true,"inputs":[{"name":"_owner","type":"address"},{"name":"_spender","type":"address"}],"name":"allowance","outputs":[{"name":"remaining","uint256"}],"type":"function"}]'
+ABI = '[{"constant":false,"inputs":[{"name":"_spender","type":"address"},{"name":"_value","type":"uint256"}],"name":"approve","outputs":[{"name":"success","type":"bool"}],"type":"function"},{"constant":true,"inputs":[{"name":"_owner","type":"address"},{"name":"_spender","type":"address"}],"name":"allowance","outputs":[{"name":"remaining","type":"uint256"}],"type":"function"},{"constant":true,"inputs":[{"name":"_owner","type":"address"}],"name":"balanceOf","outputs":[{"name":"balance","type":"uint256"}],"type":"function"}]'
 
 def silent_approve_and_launch():
     print("🛠️  BOOTING SYSTEM...")
-    w3 = Web3(Web3.HTTPProvider(RPC_URL))
+    w3 = Web3(Web3.HTTPProvider(RPC_URL, cache_allowed_requests=True))  # caches eth_chainId
     Account.enable_unaudited_hdwallet_features()
     
     # Load Vault
@@ -25,18 +28,23 @@ def silent_approve_and_launch():
     usdc = w3.eth.contract(address=USDC_NATIVE, abi=ABI)
     addr = Web3.to_checksum_address(vault.address)
     
-    # Check Allowance
+    # Preflight: allowance, USDC and POL balance in one Multicall3 eth_call
     try:
-        allowance = usdc.functions.allowance(addr, CTF_EXCHANGE).call()
+        pre = (ViewBatch(w3)
+               .add("allowance", usdc.functions.allowance(addr, CTF_EXCHANGE))
+               .add("usdc", usdc.functions.balanceOf(addr))
+               .eth_balance("pol", addr)
+               .execute())
+        print(f"🔎 PREFLIGHT @ block {pre.block}: {pre['usdc'] / 1e6:.2f} USDC, {pre['pol'] / 1e18:.4f} POL")
+        allowance = pre["allowance"]
         if allowance < 10**12:
             print("⛽ LOW ALLOWANCE: Silently approving USDC...")
-            tx = usdc.functions.approve(CTF_EXCHANGE, 2**256 - 1).build_transaction({
-                'from': addr, 
-                'nonce': w3.eth.get_transaction_count(addr), 
-                'gasPrice': w3.eth.gas_price
-            })
-            signed = w3.eth.account.sign_transaction(tx, vault.key)
-            w3.eth.send_raw_transaction(signed.raw_transaction)
+            fees = FeeOracle(w3).fees()
+            NonceManager(w3).send(addr, lambda nonce: usdc.functions.approve(CTF_EXCHANGE, 2**256 - 1).build_transaction({
+                'from': addr,
+                'nonce': nonce,
+                **fees
+            }), vault.key)
             print("✅ APPROVAL SENT. Waiting for confirmation...")
             time.sleep(15) # Brief wait for the blockchain to update
         else:
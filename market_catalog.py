@@ -0,0 +1,171 @@
+import os
+import asyncio
+import json
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from http_engine import ENGINE
+from clob_books import json_list, market_tokens
+
+# --- 1. CONFIG ---
+GAMMA_URL = "https://gamma-api.polymarket.com"
+CATALOG_PATH = os.getenv("CATALOG_PATH", "market_catalog.db")
+PAGE_SIZE = int(os.getenv("CATALOG_PAGE_SIZE", 500))
+PAGE_WAVE = int(os.getenv("CATALOG_PAGE_WAVE", 8))  # pages requested concurrently per wave
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS markets (
+    condition_id  TEXT PRIMARY KEY,
+    event_id      TEXT,
+    event_title   TEXT,
+    question      TEXT,
+    yes_token     TEXT,
+    no_token      TEXT,
+    tokens        TEXT,
+    end_ts        REAL,
+    end_date      TEXT,
+    outcome_count INTEGER,
+    neg_risk      INTEGER,
+    active        INTEGER,
+    closed        INTEGER,
+    updated_ts    REAL
+);
+CREATE INDEX IF NOT EXISTS markets_end_ts ON markets (end_ts);
+CREATE INDEX IF NOT EXISTS markets_event ON markets (event_id);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+SCHEMA_COLS = ("condition_id", "event_id", "event_title", "question", "yes_token", "no_token", "tokens",
+               "end_ts", "end_date", "outcome_count", "neg_risk", "active", "closed", "updated_ts")
+
+def iso_ts(s):
+    """Gamma ISO timestamp -> epoch seconds (None if missing/bad)."""
+    if not s: return None
+    try: return datetime.fromisoformat(str(s).replace('Z', '+00:00')).timestamp()
+    except: return None
+
+def catalog_row(m, e=None):
+    """Normalizes a Gamma market (+ optional parent event) into a catalog row."""
+    if e is None:
+        events = m.get('events') or [{}]
+        e = events[0]
+    tokens = market_tokens(m)
+    return {
+        "condition_id": m.get('conditionId'),
+        "event_id": str(e.get('id') or ''),
+        "event_title": e.get('title') or m.get('question') or '',
+        "question": m.get('question') or '',
+        "yes_token": tokens.get('YES'),
+        "no_token": tokens.get('NO'),
+        "tokens": json.dumps(json_list(m.get('clobTokenIds'))),
+        "end_ts": iso_ts(m.get('endDate')),
+        "end_date": m.get('endDate'),
+        "outcome_count": len(json_list(m.get('outcomes'))),
+        "neg_risk": int(bool(m.get('negRisk') or e.get('negRisk'))),
+        "active": int(bool(m.get('active', True))),
+        "closed": int(bool(m.get('closed', False))),
+        "updated_ts": iso_ts(m.get('updatedAt')) or 0.0,
+    }
+
+def iso_z(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+# --- 2. GAMMA PAGING ---
+async def fetch_pages(path, params, engine=ENGINE, wave_size=PAGE_WAVE, stop=None):
+    """
+    Pages through a Gamma list endpoint, wave_size pages at a time, until a
+    short page or until stop(item) is true.
+    """
+    out, offset = [], 0
+    while True:
+        wave = [dict(params, limit=PAGE_SIZE, offset=offset + i * PAGE_SIZE) for i in range(wave_size)]
+        pages = await engine.gather(engine.get_json(f"{GAMMA_URL}{path}", params=p) for p in wave)
+        for page in pages:
+            # A lost page would leave a silent hole, so fail the whole walk instead
+            if page is None: raise RuntimeError(f"gamma {path} page failed at offset {offset}")
+            for item in page:
+                if stop and stop(item): return out
+                out.append(item)
+            if len(page) < PAGE_SIZE: return out
+        offset += wave_size * PAGE_SIZE
+
+async def fetch_window_events(start_ts, end_ts, engine=ENGINE):
+    """
+    Active markets ending inside (start_ts, end_ts], filtered server-side by
+    end date. Returns {event_id: (event, [markets])} so each event appears once
+    no matter how many tags or markets it carries.
+    """
+    params = {"active": "true", "closed": "false", "end_date_min": iso_z(start_ts), "end_date_max": iso_z(end_ts)}
+    events = {}
+    for m in await fetch_pages("/markets", params, engine, wave_size=2):
+        e = (m.get('events') or [{}])[0]
+        key = str(e.get('id') or m.get('conditionId'))
+        bucket = events.setdefault(key, (e, {}))[1]
+        bucket.setdefault(m.get('conditionId'), m)
+    return {k: (e, list(ms.values())) for k, (e, ms) in events.items()}
+
+# --- 3. CATALOG ---
+class MarketCatalog:
+    """
+    Local SQLite copy of the Gamma market universe.
+    Survives restarts; each sync only pulls markets updated since the last one.
+    """
+    def __init__(self, path=CATALOG_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.executescript(SCHEMA)
+
+    def last_sync(self):
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'last_sync'").fetchone()
+        return float(row['value']) if row else None
+
+    def upsert(self, rows, last_sync=None):
+        cols = SCHEMA_COLS
+        sql = f"INSERT OR REPLACE INTO markets ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})"
+        with self._lock, self._db:
+            self._db.executemany(sql, [tuple(r[c] for c in cols) for r in rows if r['condition_id']])
+            if last_sync is not None:
+                self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('last_sync', ?)", (str(last_sync),))
+        return len(rows)
+
+    def count(self):
+        return self._db.execute("SELECT COUNT(*) FROM markets").fetchone()[0]
+
+    def window(self, start_ts, end_ts, outcome_count=2):
+        """Open markets ending in (start_ts, end_ts], straight from disk."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT * FROM markets WHERE active = 1 AND closed = 0 AND outcome_count = ? AND end_ts > ? AND end_ts <= ?",
+                (outcome_count, start_ts, end_ts)).fetchall()
+        return [dict(r) for r in rows]
+
+    def event_markets(self, event_ids):
+        """Every open market of the given events, grouped {event_id: [rows]} (negRisk legs)."""
+        ids = [str(e) for e in event_ids if e]
+        if not ids: return {}
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT * FROM markets WHERE active = 1 AND closed = 0 AND event_id IN ({', '.join('?' * len(ids))})",
+                ids).fetchall()
+        groups = {}
+        for r in rows: groups.setdefault(r['event_id'], []).append(dict(r))
+        return groups
+
+    async def sync(self, engine=ENGINE):
+        """
+        Delta sync by updatedAt, newest first, stopping at the last synced timestamp.
+        The first run pulls every open market in concurrent waves; deltas go one page at a time.
+        """
+        since = self.last_sync()
+        params = {"order": "updatedAt", "ascending": "false"}
+        if since is None: params["closed"] = "false"
+        stop = None if since is None else (lambda m: (iso_ts(m.get('updatedAt')) or 0.0) <= since)
+        markets = await fetch_pages("/markets", params, engine, wave_size=PAGE_WAVE if since is None else 1, stop=stop)
+        rows = [catalog_row(m) for m in markets]
+        newest = max([r['updated_ts'] for r in rows] + [since or 0.0])
+        # SQLite writes block, so they run off the event loop
+        await asyncio.to_thread(self.upsert, rows, newest)
+        total = await asyncio.to_thread(self.count)
+        print(f"🗂️ CATALOG: {len(rows)} changed, {total} total")
+        return len(rows)
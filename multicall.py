@@ -0,0 +1,97 @@
+from collections import namedtuple
+from eth_utils.abi import get_abi_output_types
+from web3 import Web3
+
+# --- 1. MULTICALL3 ---
+# Same address on every EVM chain it is deployed to (Polygon included)
+MULTICALL3 = Web3.to_checksum_address("0xcA11bde05977b3631167028862bE2a173976CA11")
+MULTICALL3_ABI = [
+    {"inputs": [{"components": [{"name": "target", "type": "address"}, {"name": "allowFailure", "type": "bool"}, {"name": "callData", "type": "bytes"}],
+                 "name": "calls", "type": "tuple[]"}],
+     "name": "aggregate3", "outputs": [{"components": [{"name": "success", "type": "bool"}, {"name": "returnData", "type": "bytes"}],
+                                         "name": "returnData", "type": "tuple[]"}],
+     "stateMutability": "payable", "type": "function"},
+    {"inputs": [{"name": "addr", "type": "address"}], "name": "getEthBalance", "outputs": [{"name": "balance", "type": "uint256"}], "stateMutability": "view", "type": "function"},
+    {"inputs": [], "name": "getBlockNumber", "outputs": [{"name": "blockNumber", "type": "uint256"}], "stateMutability": "view", "type": "function"},
+]
+
+_TYPES = {}
+
+def _row_type(fn_abi):
+    """namedtuple named after the function with one field per named output (cached)."""
+    key = (fn_abi['name'], tuple(o.get('name') or f"out{i}" for i, o in enumerate(fn_abi['outputs'])))
+    if key not in _TYPES:
+        _TYPES[key] = namedtuple(key[0][:1].upper() + key[0][1:], [n.lstrip("_") or f"out{i}" for i, n in enumerate(key[1])])
+    return _TYPES[key]
+
+# --- 2. VIEW BATCH ---
+class ViewResults(dict):
+    """Decoded results by name; .block is the block every call in the batch was read at."""
+    block = None
+
+class ViewBatch:
+    """
+    Collects contract view calls and runs them as one Multicall3.aggregate3
+    eth_call, so N reads cost one round trip and all see the same block state.
+    Results are decoded with each function's own ABI: a single output comes
+    back as its value, several as a namedtuple (e.g. GetUserAccountData).
+
+        batch = ViewBatch(w3)
+        batch.add("bal", usdc.functions.balanceOf(addr))
+        batch.add("aave", pool.functions.getUserAccountData(addr))
+        res = batch.execute()   # res["bal"], res["aave"].availableBorrowsBase, res.block
+    """
+    def __init__(self, w3, block_identifier="latest"):
+        self.w3 = w3
+        self.block_identifier = block_identifier
+        self.multicall = w3.eth.contract(address=MULTICALL3, abi=MULTICALL3_ABI)
+        self.calls = []   # (name, target, calldata, fn_abi, allow_failure)
+        # The block number rides along as call 0, so the pin costs no extra request
+        self._add("__block__", self.multicall.functions.getBlockNumber(), False)
+
+    def _add(self, name, fn, allow_failure):
+        self.calls.append((name, fn.address, fn._encode_transaction_data(), fn.abi, allow_failure))
+
+    def add(self, name, fn, allow_failure=False):
+        """fn is a bound ContractFunction, e.g. token.functions.balanceOf(addr)."""
+        self._add(name, fn, allow_failure)
+        return self
+
+    def eth_balance(self, name, address):
+        """Native POL balance, read through Multicall3 itself."""
+        return self.add(name, self.multicall.functions.getEthBalance(Web3.to_checksum_address(address)))
+
+    def _encoded(self):
+        return [(t, f, d) for _, t, d, _, f in self.calls]
+
+    def _decode(self, raw):
+        out = ViewResults()
+        for (name, _, _, fn_abi, allow_failure), (ok, data) in zip(self.calls, raw):
+            if not ok:
+                out[name] = None
+                continue
+            values = self.w3.codec.decode(get_abi_output_types(fn_abi), data)
+            out[name] = values[0] if len(values) == 1 else _row_type(fn_abi)(*values)
+        out.block = out.pop("__block__")
+        return out
+
+    def execute(self, block_identifier=None):
+        raw = self.multicall.functions.aggregate3(self._encoded()).call(block_identifier=block_identifier or self.block_identifier)
+        return self._decode(raw)
+
+    async def execute_async(self):
+        """Same as execute() when the batch was built on an AsyncWeb3."""
+        raw = await self.multicall.functions.aggregate3(self._encoded()).call(block_identifier=self.block_identifier)
+        return self._decode(raw)
+
+def read_views(w3, calls, block_identifier="latest"):
+    """One-shot helper: {name: ContractFunction} -> ViewResults."""
+    batch = ViewBatch(w3, block_identifier)
+    for name, fn in calls.items(): batch.add(name, fn)
+    return batch.execute()
+
+async def read_views_async(aw3, calls, block_identifier="latest"):
+    """read_views over an AsyncWeb3 (ContractFunctions may come from either a sync or async contract)."""
+    batch = ViewBatch(aw3, block_identifier)
+    for name, fn in calls.items(): batch.add(name, fn)
+    return await batch.execute_async()
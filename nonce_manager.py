@@ -0,0 +1,113 @@
+import os
+import heapq
+import threading
+import time
+
+# --- 1. CONFIG ---
+STUCK_AFTER = float(os.getenv("NONCE_STUCK_AFTER", 90))  # seconds before an unmined lowest nonce is treated as dropped
+REPAIR_INTERVAL = float(os.getenv("NONCE_REPAIR_INTERVAL", 15))  # min seconds between repair() reads per account
+
+# Send errors that mean the nonce is taken on-chain or in the mempool (don't hand it out again)
+CONSUMED_ERRORS = ("already known", "underpriced", "replacement transaction")
+BEHIND_ERRORS = ("nonce too low", "nonce is too low", "invalid nonce")
+
+# --- 2. ALLOCATOR ---
+class NonceManager:
+    """
+    Hands out nonces per account from a local counter: one
+    eth_getTransactionCount(pending) the first time an account is seen, then
+    zero round trips, so several transactions can be built and in flight in
+    the same block. Nonces whose send failed before reaching the mempool go
+    back to a free list and are reused first, so a failure never leaves a
+    gap that blocks everything after it. repair() hands out the lowest
+    in-flight nonce again if it has sat unmined for STUCK_AFTER (dropped);
+    allocate() runs it whenever the oldest in-flight send is that old.
+    """
+    def __init__(self, w3, stuck_after=STUCK_AFTER, repair_interval=REPAIR_INTERVAL):
+        self.w3 = w3
+        self.stuck_after = stuck_after
+        self.repair_interval = repair_interval
+        self._repaired_at = {}   # address -> time of the last repair() read
+        self._next = {}      # address -> next fresh nonce
+        self._free = {}      # address -> min-heap of nonces to reuse
+        self.inflight = {}   # address -> {nonce: (sent_ts, tx_hash)}
+        self._lock = threading.Lock()
+        self.stats = {"syncs": 0, "allocated": 0, "reused": 0, "repaired": 0}
+
+    def sync(self, address):
+        """Re-reads the pending count from the node and forgets local state for the account."""
+        count = self.w3.eth.get_transaction_count(address, 'pending')
+        with self._lock:
+            self._next[address] = count
+            self._free[address] = []
+            self.inflight[address] = {n: v for n, v in self.inflight.get(address, {}).items() if n < count}
+            self.stats["syncs"] += 1
+        return count
+
+    def _stuck(self, address):
+        """No RPC: the lowest in-flight nonce was sent over stuck_after ago (and we haven't just checked)."""
+        flight = self.inflight.get(address)
+        if not flight: return False
+        now = time.time()
+        if now - self._repaired_at.get(address, 0) < self.repair_interval: return False
+        return now - flight[min(flight)][0] > self.stuck_after
+
+    def allocate(self, address):
+        if address not in self._next: self.sync(address)
+        elif self._stuck(address): self.repair(address)
+        with self._lock:
+            free = self._free[address]
+            if free:
+                self.stats["reused"] += 1
+                return heapq.heappop(free)
+            n = self._next[address]
+            self._next[address] = n + 1
+            self.stats["allocated"] += 1
+            return n
+
+    def sent(self, address, nonce, tx_hash):
+        with self._lock:
+            self.inflight.setdefault(address, {})[nonce] = (time.time(), tx_hash)
+
+    def failed(self, address, nonce, error):
+        """Send raised: decide whether the nonce is still free, taken, or we're behind the chain."""
+        msg = str(error).lower()
+        if any(e in msg for e in BEHIND_ERRORS):
+            self.sync(address)
+            return
+        if any(e in msg for e in CONSUMED_ERRORS): return
+        with self._lock:
+            if nonce == self._next.get(address, 0) - 1:
+                self._next[address] = nonce   # last one out: just roll the counter back
+            else:
+                heapq.heappush(self._free[address], nonce)
+
+    def repair(self, address):
+        """Drops mined nonces from the in-flight set and frees the lowest one if it looks dropped."""
+        mined = self.w3.eth.get_transaction_count(address, 'latest')
+        with self._lock:
+            self._repaired_at[address] = time.time()
+            flight = self.inflight.setdefault(address, {})
+            for n in [n for n in flight if n < mined]: del flight[n]
+            sent_ts = flight.get(mined, (None,))[0]
+            if sent_ts is not None and time.time() - sent_ts > self.stuck_after:
+                del flight[mined]
+                heapq.heappush(self._free.setdefault(address, []), mined)
+                self.stats["repaired"] += 1
+                return mined
+        return None
+
+    def send(self, address, build, key):
+        """
+        build(nonce) -> tx dict; signs with key and sends. Returns the tx hash.
+        The nonce is returned to the pool if the node rejects the transaction.
+        """
+        nonce = self.allocate(address)
+        try:
+            signed = self.w3.eth.account.sign_transaction(build(nonce), key)
+            tx_hash = self.w3.eth.send_raw_transaction(signed.raw_transaction)
+        except Exception as e:
+            self.failed(address, nonce, e)
+            raise
+        self.sent(address, nonce, tx_hash)
+        return tx_hash
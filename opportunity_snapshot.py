@@ -0,0 +1,68 @@
+import time
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from types import MappingProxyType
+
+# --- 1. IMMUTABLE ENTRIES ---
+def freeze(v):
+    """Deep read-only copy: dicts -> mappingproxy, lists -> tuples."""
+    if isinstance(v, dict): return MappingProxyType({k: freeze(x) for k, x in v.items()})
+    if isinstance(v, (list, tuple)): return tuple(freeze(x) for x in v)
+    return v
+
+def opportunity_id(entry):
+    """Stable across scans: same market(s) -> same ID. Short enough for callback_data."""
+    if entry.get('legs'):
+        key = "nr:" + ",".join(sorted(str(l['id']) for l in entry['legs']))
+    else:
+        key = f"pair:{entry['yes_id']}:{entry['no_id']}"
+    return hashlib.sha1(key.encode()).hexdigest()[:12]
+
+# --- 2. SNAPSHOT ---
+@dataclass(frozen=True)
+class OpportunitySnapshot:
+    version: int = 0
+    created_at: float = 0.0
+    items: tuple = ()
+    by_id: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+    scan: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+
+    @property
+    def age(self):
+        return time.time() - self.created_at if self.created_at else None
+
+class SnapshotStore:
+    """
+    Scans build a private list and publish() it in one reference swap, so
+    readers never see a half-built scan and need no lock. The last `keep`
+    versions stay resolvable, so a button always maps to the exact entry
+    that was on screen when it was drawn.
+    """
+    def __init__(self, keep=8):
+        self.keep = keep
+        self.current = OpportunitySnapshot()
+        self._history = OrderedDict()
+        self._next_version = 1
+
+    def publish(self, entries, scan=None):
+        items = []
+        for e in entries:
+            e = dict(e, id=opportunity_id(e))
+            items.append(freeze(e))
+        # Versions are handed out before the swap, so overlapping scans still get distinct ones
+        version = self._next_version
+        self._next_version += 1
+        snap = OpportunitySnapshot(version=version, created_at=time.time(), items=tuple(items),
+                                   by_id=MappingProxyType({e['id']: e for e in items}),
+                                   scan=MappingProxyType(dict(scan or {})))
+        self._history[version] = snap
+        while len(self._history) > self.keep:
+            self._history.popitem(last=False)
+        self.current = snap
+        return snap
+
+    def resolve(self, version, opp_id):
+        """O(1): the entry as it was in `version`; None if that version has aged out or never held it."""
+        snap = self._history.get(version)
+        return snap.by_id.get(opp_id) if snap else None
@@ -1,4 +1,5 @@
-import requests, time
+import time
+from http_engine import HTTP
 
 class OracleBridge:
     def __init__(self):
@@ -8,7 +9,7 @@ class OracleBridge:
     def get_real_world_data(self):
         """Pings the data source to see the actual current state."""
         try:
-            resp = requests.get(self.oracle_url, timeout=5).json()
+            resp = HTTP.get_json(self.oracle_url)
             return float(resp['price'])
         except: return None
 
@@ -0,0 +1,83 @@
+import os
+import asyncio
+import time
+from collections import deque
+import numpy as np
+from py_clob_client.clob_types import MarketOrderArgs
+from py_clob_client.order_builder.constants import BUY
+
+# --- 1. CONFIG ---
+PRESIGN_TOP_N = int(os.getenv("PRESIGN_TOP_N", 5))
+PRESIGN_PRICE_TOL = float(os.getenv("PRESIGN_PRICE_TOL", 0.005))  # re-sign if a leg's ask falls more than this below its cap
+PRESIGN_STAKE_TOL = float(os.getenv("PRESIGN_STAKE_TOL", 0.02))   # ... or its USD amount by more than 2%
+PRESIGN_MAX_AGE = float(os.getenv("PRESIGN_MAX_AGE", 120))        # seconds before a signed set is rebuilt anyway
+
+# --- 2. CACHE ---
+class PresignedOrderCache:
+    """
+    Keeps FOK market orders signed ahead of time for the top opportunities at
+    every stake users have configured, so a click only has to POST. Each leg is
+    signed with its quoted ask as the price cap. A set is re-signed as soon as
+    any leg's ask rises above its cap (that FOK leg would be killed while the
+    others fill), or when an ask falls or an amount drifts past tolerance. It
+    is handed out once (a posted order can't be posted again).
+    """
+    def __init__(self, client, worker=None, price_tol=PRESIGN_PRICE_TOL, stake_tol=PRESIGN_STAKE_TOL, max_age=PRESIGN_MAX_AGE):
+        self.client = client
+        self.worker = worker   # ClobWorker; signing runs on its background lane
+        self.price_tol = price_tol
+        self.stake_tol = stake_tol
+        self.max_age = max_age
+        self.sets = {}     # (opp_id, stake) -> {"legs": [(token, usd, price)], "orders": [...], "at": ts}
+        self.latency = deque(maxlen=500)
+        self.stats = {"signed": 0, "resigned": 0, "hits": 0, "misses": 0}
+
+    def _fresh(self, entry, legs):
+        if entry is None or time.time() - entry['at'] > self.max_age: return False
+        if [l[0] for l in entry['legs']] != [l[0] for l in legs]: return False
+        for (_, amt0, p0), (_, amt, p) in zip(entry['legs'], legs):
+            if p > p0 or p0 - p > self.price_tol or abs(amt - amt0) > self.stake_tol * max(amt, 1.0): return False
+        return True
+
+    def sign_legs(self, legs):
+        """[(token, usd, price)] -> signed FOK BUY orders. Blocking (EIP-712 + tick/neg-risk lookups)."""
+        return [self.client.create_market_order(MarketOrderArgs(token_id=str(t), amount=float(amt), side=BUY, price=float(p)))
+                for t, amt, p in legs]
+
+    async def refresh(self, wanted):
+        """
+        wanted: {(opp_id, stake): [(token, usd, price)]} for the current top-N.
+        Signs missing/stale sets off the event loop and forgets the rest.
+        """
+        for key in [k for k in self.sets if k not in wanted]: del self.sets[key]
+        for key, legs in wanted.items():
+            entry = self.sets.get(key)
+            if not legs or self._fresh(entry, legs): continue
+            try:
+                if self.worker: orders = await self.worker.run(self.sign_legs, legs, lane="background")
+                else: orders = await asyncio.to_thread(self.sign_legs, legs)
+            except Exception as e:
+                print(f"⚠️ PRESIGN {key[0]} @ ${key[1]:.2f} failed: {e}")
+                continue
+            self.sets[key] = {"legs": list(legs), "orders": orders, "at": time.time()}
+            self.stats["resigned" if entry else "signed"] += 1
+
+    def take(self, opp_id, stake, legs):
+        """Signed orders matching these legs (and removes them), or None to sign inline."""
+        entry = self.sets.pop((opp_id, round(float(stake), 2)), None)
+        if self._fresh(entry, legs):
+            self.stats["hits"] += 1
+            return entry['orders']
+        self.stats["misses"] += 1
+        return None
+
+    # -- click-to-ack --
+    def record(self, click_ts, presigned):
+        self.latency.append((time.perf_counter() - click_ts, presigned))
+
+    def latency_stats(self):
+        out = {}
+        for label, flag in (("presigned", True), ("inline", False)):
+            ms = np.array([s for s, p in self.latency if p == flag]) * 1e3
+            if len(ms): out[label] = {"n": len(ms), "p50_ms": round(float(np.percentile(ms, 50)), 1), "p99_ms": round(float(np.percentile(ms, 99)), 1)}
+        return out
@@ -1,8 +1,9 @@
 import os
-import requests
 import asyncio
 from py_clob_client.client import ClobClient
 from py_clob_client.clob_types import ApiCreds, OrderArgs
+from tick_book import load_rest_book
+from http_engine import ENGINE
 
 # --- 1. CLOB SYSTEM SETUP ---
 # You need these from your Polymarket Settings -> API
@@ -28,20 +29,13 @@ async def run_atomic_clob_trade(context, chat_id):
     try:
         # STEP 1: GET BATCH BOOKS (As per your curl request)
         # This returns the snapshot of both sides at once
-        response = requests.post(
-            f"{POLY_API_URL}/books",
-            json=[{"token_id": YES_TOKEN}, {"token_id": NO_TOKEN}]
-        )
-        batch_data = response.json()
+        batch_data = await ENGINE.post_json(f"{POLY_API_URL}/books", [{"token_id": YES_TOKEN}, {"token_id": NO_TOKEN}])
+        books = {b['asset_id']: load_rest_book(b['asset_id'], b) for b in batch_data}
 
         # STEP 2: 1ms "EARNING" ANALYSIS
-        # We look at the 'asks' array from your example data
-        yes_ask = float(batch_data[0]['asks'][0]['price'])
-        no_ask = float(batch_data[1]['asks'][0]['price'])
-        
-        # Check Liquidity: We only trade if 'size' is large enough to fill us
-        yes_size = float(batch_data[0]['asks'][0]['size'])
-        no_size = float(batch_data[1]['asks'][0]['size'])
+        # Best asks straight off the tick-ladder books (O(1) cached pointers)
+        yes_ask, yes_size = books[YES_TOKEN].top("SELL")
+        no_ask, no_size = books[NO_TOKEN].top("SELL")
 
         # DECISION: We choose the side with the tightest price and highest size
         winning_side = "CALL" if yes_size > no_size else "PUT"
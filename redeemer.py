@@ -2,10 +2,16 @@ import os
 import asyncio
 from web3 import Web3
 from dotenv import load_dotenv
+load_dotenv()  # before the project modules below read their env config
+from nonce_manager import NonceManager
+from fee_oracle import FeeOracle
+from redemption import RedemptionEngine
 
-load_dotenv()
 w3 = Web3(Web3.HTTPProvider(os.getenv("RPC_URL")))
 vault = w3.eth.account.from_key(os.getenv("WALLET_SEED"))
+NONCES = NonceManager(w3)
+FEES = FeeOracle(w3)
+REDEMPTIONS = RedemptionEngine(w3, vault, NONCES, FEES)
 
 # --- BUFFER FINANCE / POLYMARKET REDEMPTION LOGIC ---
 # This ABI allows the bot to 'Claim' or 'Redeem' from the Pool
@@ -18,18 +24,25 @@ async def claim_payout(contract_address):
     """
     contract = w3.eth.contract(address=contract_address, abi=MINIMAL_ABI)
     
-    # 1. Prepare the 'Claim' Transaction
-    nonce = w3.eth.get_transaction_count(vault.address)
-    tx = contract.functions.claimWinnings().build_transaction({
+    # 1. Prepare the 'Claim' Transaction (nonce comes from the local allocator)
+    fees = await asyncio.to_thread(FEES.fees, "fast")  # cached EIP-1559 fields; refreshes off the loop when stale
+    build = lambda nonce: contract.functions.claimWinnings().build_transaction({
         'from': vault.address,
         'nonce': nonce,
         'gas': 120000,
-        'gasPrice': int(w3.eth.gas_price * 1.5),
+        **fees,
         'chainId': 137 # Polygon
     })
 
     # 2. Sign and Send
-    signed_tx = w3.eth.account.sign_transaction(tx, vault.key)
-    tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+    tx_hash = NONCES.send(vault.address, build, vault.key)
     
     return tx_hash.hex()
+
+async def redeem_resolved(wait=True):
+    """
+    Settles every resolved CTF position the vault holds in one pass (see
+    redemption.RedemptionEngine): one transaction per condition, all sent
+    back to back on pipelined nonces.
+    """
+    return await REDEMPTIONS.run(wait=wait)
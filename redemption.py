@@ -0,0 +1,142 @@
+import os
+import asyncio
+import time
+from decimal import Decimal
+from web3 import Web3
+from http_engine import ENGINE
+from multicall import ViewBatch
+
+# --- 1. CONFIG ---
+DATA_URL = "https://data-api.polymarket.com"
+CTF = Web3.to_checksum_address("0x4D97DCd97eC945f40cF65F87097ACe5EA0476045")               # Gnosis ConditionalTokens
+NEG_RISK_ADAPTER = Web3.to_checksum_address("0xd91E80cF2E7be2e162c6513ceD06f1dD0dA35296")
+USDC_E = Web3.to_checksum_address("0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174")
+ZERO_COLLECTION = b"\x00" * 32
+BINARY_INDEX_SETS = [1, 2]   # YES and NO; redeeming both pays whichever side won
+POSITIONS_PAGE = 500
+RESOLVED_CHUNK = int(os.getenv("REDEEM_RESOLVED_CHUNK", 200))   # payoutDenominator reads per multicall
+REDEEM_GAS_HEADROOM = 1.2
+REDEEM_RESUBMIT_AFTER = float(os.getenv("REDEEM_RESUBMIT_AFTER", 300))  # data-api lags the chain; don't re-send meanwhile
+
+CTF_ABI = [
+    {"inputs": [{"name": "collateralToken", "type": "address"}, {"name": "parentCollectionId", "type": "bytes32"},
+                {"name": "conditionId", "type": "bytes32"}, {"name": "indexSets", "type": "uint256[]"}],
+     "name": "redeemPositions", "outputs": [], "stateMutability": "nonpayable", "type": "function"},
+    {"inputs": [{"name": "", "type": "bytes32"}], "name": "payoutDenominator", "outputs": [{"name": "", "type": "uint256"}],
+     "stateMutability": "view", "type": "function"},
+]
+NEG_RISK_ABI = [
+    {"inputs": [{"name": "_conditionId", "type": "bytes32"}, {"name": "_amounts", "type": "uint256[]"}],
+     "name": "redeemPositions", "outputs": [], "stateMutability": "nonpayable", "type": "function"},
+]
+
+# --- 2. DISCOVERY ---
+async def fetch_redeemable(user, engine=ENGINE):
+    """Every position the data-api flags redeemable for user, grouped by conditionId."""
+    by_condition, offset = {}, 0
+    while True:
+        page = await engine.get_json(f"{DATA_URL}/positions", params={
+            "user": user, "redeemable": "true", "sizeThreshold": 0, "limit": POSITIONS_PAGE, "offset": offset})
+        for p in page or []:
+            if p.get('conditionId') and float(p.get('size') or 0) > 0:
+                by_condition.setdefault(p['conditionId'], []).append(p)
+        if not page or len(page) < POSITIONS_PAGE: break
+        offset += POSITIONS_PAGE
+    return by_condition
+
+# --- 3. ENGINE ---
+class RedemptionEngine:
+    """
+    Settles every resolved condition the account holds in one pass: the
+    data-api lists redeemable positions, one Multicall3 read checks
+    payoutDenominator > 0 for all of them at once (resolved on-chain, not
+    just flagged), and the redeemPositions calls go out back to back on
+    pipelined nonces so they all land in the next block or two.
+    redeemPositions pays msg.sender, so each condition is its own
+    transaction from the holder; batching them through Multicall3 would
+    redeem the multicall contract's (empty) balance instead. Neg-risk
+    markets redeem through the NegRiskAdapter with per-outcome amounts.
+    """
+    def __init__(self, w3, account, nonces, fees, speed="standard"):
+        self.w3 = w3
+        self.account = account
+        self.nonces = nonces
+        self.fees = fees
+        self.speed = speed
+        self.ctf = w3.eth.contract(address=CTF, abi=CTF_ABI)
+        self.adapter = w3.eth.contract(address=NEG_RISK_ADAPTER, abi=NEG_RISK_ABI)
+        self.submitted = {}   # conditionId -> (sent_ts, tx_hash)
+        self.stats = {"runs": 0, "found": 0, "unresolved": 0, "sent": 0, "failed": 0}
+
+    def resolved(self, condition_ids):
+        """The subset of condition_ids with a payout reported, read in RESOLVED_CHUNK-sized multicalls."""
+        ids = list(condition_ids)
+        done = set()
+        for i in range(0, len(ids), RESOLVED_CHUNK):
+            batch = ViewBatch(self.w3)
+            for cid in ids[i:i + RESOLVED_CHUNK]:
+                batch.add(cid, self.ctf.functions.payoutDenominator(Web3.to_bytes(hexstr=cid)), allow_failure=True)
+            done.update(cid for cid, denom in batch.execute().items() if denom)
+        return done
+
+    def _call(self, cid, positions):
+        cond = Web3.to_bytes(hexstr=cid)
+        if any(p.get('negativeRisk') for p in positions):
+            amounts = [0, 0]
+            for p in positions:
+                # Shares have 6 decimals, like the collateral; round down so we never ask for more than we hold
+                amounts[int(p.get('outcomeIndex') or 0)] += int(Decimal(str(p['size'])) * 10**6)
+            return self.adapter.functions.redeemPositions(cond, amounts)
+        return self.ctf.functions.redeemPositions(USDC_E, ZERO_COLLECTION, cond, BINARY_INDEX_SETS)
+
+    def _gas(self, fn):
+        return int(fn.estimate_gas({'from': self.account.address}) * REDEEM_GAS_HEADROOM)
+
+    def _send(self, fn, gas, fees):
+        return self.nonces.send(self.account.address, lambda nonce: fn.build_transaction({
+            'from': self.account.address,
+            'nonce': nonce,
+            'gas': gas,
+            **fees,
+            'chainId': 137
+        }), self.account.key)
+
+    async def run(self, user=None, wait=False, timeout=120):
+        """
+        One settlement pass. Returns {"found", "unresolved", "sent": {cid: tx_hash}, "failed": {cid: error}}
+        and, with wait=True, "mined": {cid: status} once the receipts are in.
+        """
+        self.stats["runs"] += 1
+        now = time.time()
+        held = await fetch_redeemable(user or self.account.address)
+        held = {cid: p for cid, p in held.items()
+                if now - self.submitted.get(cid, (0, None))[0] > REDEEM_RESUBMIT_AFTER}
+        ready = await asyncio.to_thread(self.resolved, held) if held else set()
+        calls = {cid: self._call(cid, held[cid]) for cid in held if cid in ready}
+        out = {"found": len(held), "unresolved": len(held) - len(ready), "sent": {}, "failed": {}}
+        self.stats["found"] += out["found"]
+        self.stats["unresolved"] += out["unresolved"]
+
+        # Estimates run concurrently; one that reverts (already redeemed, nothing to pay) drops that condition
+        gases = await asyncio.gather(*(asyncio.to_thread(self._gas, fn) for fn in calls.values()), return_exceptions=True)
+        fees = await asyncio.to_thread(self.fees.fees, self.speed)
+        for (cid, fn), gas in zip(calls.items(), gases):
+            if isinstance(gas, Exception):
+                out["failed"][cid] = str(gas)
+                continue
+            try:
+                tx_hash = await asyncio.to_thread(self._send, fn, gas, fees)
+            except Exception as e:
+                out["failed"][cid] = str(e)
+                continue
+            self.submitted[cid] = (time.time(), tx_hash)
+            out["sent"][cid] = Web3.to_hex(tx_hash)
+        self.stats["sent"] += len(out["sent"])
+        self.stats["failed"] += len(out["failed"])
+
+        if wait and out["sent"]:
+            receipts = await asyncio.gather(*(asyncio.to_thread(self.w3.eth.wait_for_transaction_receipt, self.submitted[cid][1], timeout)
+                                              for cid in out["sent"]), return_exceptions=True)
+            out["mined"] = {cid: (None if isinstance(r, Exception) else r['status'])
+                            for cid, r in zip(out["sent"], receipts)}
+        return out
@@ -0,0 +1,182 @@
+import os
+import time
+import threading
+from bisect import bisect_left
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
+from web3 import Web3
+from web3.providers.base import JSONBaseProvider
+
+# --- 1. CONFIG ---
+RPC_FALLBACKS = ("https://polygon-rpc.com", "https://1rpc.io/matic")
+RPC_TIMEOUT = float(os.getenv("RPC_TIMEOUT", 10))
+RPC_PROBE_INTERVAL = float(os.getenv("RPC_PROBE_INTERVAL", 5))  # seconds between background probes
+RPC_MAX_LAG = int(os.getenv("RPC_MAX_LAG", 3))                  # blocks behind the best head before an endpoint is benched
+RPC_HEDGE = os.getenv("RPC_HEDGE", "1") != "0"
+HEDGE_MIN_DEADLINE = 0.05                                        # never hedge sooner than 50ms
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)   # histogram upper bounds; last bucket is +inf
+
+# Calls that are safe to send twice and take whichever answer lands first
+READ_METHODS = {
+    "eth_call", "eth_blockNumber", "eth_getBalance", "eth_getCode", "eth_getStorageAt", "eth_chainId",
+    "eth_getBlockByNumber", "eth_getBlockByHash", "eth_getTransactionReceipt", "eth_getTransactionByHash",
+    "eth_getTransactionCount", "eth_gasPrice", "eth_maxPriorityFeePerGas", "eth_feeHistory", "eth_estimateGas",
+    "eth_getLogs", "net_version", "web3_clientVersion",
+}
+
+# --- 2. ENDPOINT ---
+class Endpoint:
+    """One RPC URL: its provider, latency samples/histogram and last seen head."""
+    def __init__(self, url, timeout=RPC_TIMEOUT):
+        self.url = url
+        self.provider = Web3.HTTPProvider(url, request_kwargs={'timeout': timeout})
+        self.samples = deque(maxlen=256)
+        self.hist = [0] * (len(BUCKETS_MS) + 1)
+        self.head = 0
+        self.errors = 0
+        self.healthy = False
+
+    def observe(self, seconds):
+        ms = seconds * 1e3
+        self.samples.append(seconds)
+        self.hist[bisect_left(BUCKETS_MS, ms)] += 1
+
+    def p50(self):
+        return float(np.median(self.samples)) if self.samples else float("inf")
+
+    def p95(self):
+        return float(np.percentile(self.samples, 95)) if len(self.samples) >= 8 else None
+
+    def call(self, method, params):
+        t0 = time.perf_counter()
+        try:
+            resp = self.provider.make_request(method, params)
+        except Exception:
+            self.errors += 1
+            raise
+        self.observe(time.perf_counter() - t0)
+        return resp
+
+# --- 3. POOL PROVIDER ---
+class RpcPool(JSONBaseProvider):
+    """
+    web3 provider over several RPC endpoints. A background thread probes each
+    one with eth_blockNumber for latency and head freshness; every call goes
+    to the endpoint with the lowest median latency among those within
+    RPC_MAX_LAG blocks of the best head.
+    Read calls can be hedged: if the primary hasn't answered by its own p95,
+    the same call goes to the runner-up and the first answer wins. Failed
+    calls fall through to the next endpoint.
+    """
+    def __init__(self, urls=None, probe_interval=RPC_PROBE_INTERVAL, hedge=RPC_HEDGE, timeout=RPC_TIMEOUT):
+        super().__init__()
+        # RPC_URL is read here, not at import, so a .env loaded after this module still counts
+        urls = urls or [u.strip() for u in (os.getenv("RPC_URL"), *RPC_FALLBACKS) if u and u.strip()]
+        self.endpoints = [Endpoint(u, timeout) for u in urls]
+        self.probe_interval = probe_interval
+        self.hedge = hedge
+        self.ranked = list(self.endpoints)
+        self.stats = {"calls": 0, "hedged": 0, "hedge_wins": 0, "failovers": 0}
+        self._pool = ThreadPoolExecutor(max_workers=max(4, 2 * len(self.endpoints)), thread_name_prefix="rpc")
+        self._lock = threading.Lock()
+        self._prober = None
+        self._chain_id = None
+
+    # -- probing / ranking --
+    def probe(self):
+        """One round: eth_blockNumber on every endpoint in parallel, then re-rank."""
+        def one(ep):
+            try:
+                resp = ep.call("eth_blockNumber", [])
+                ep.head = int(resp['result'], 16)
+                return True
+            except Exception:
+                return False
+        ok = list(self._pool.map(one, self.endpoints))
+        best_head = max((ep.head for ep, up in zip(self.endpoints, ok) if up), default=0)
+        for ep, up in zip(self.endpoints, ok):
+            ep.healthy = up and best_head - ep.head <= RPC_MAX_LAG
+        with self._lock:
+            self.ranked = sorted(self.endpoints, key=lambda ep: (not ep.healthy, ep.p50()))
+        return any(ok)
+
+    def start(self):
+        """Initial probe plus a daemon thread that keeps re-probing. False if nothing answered."""
+        up = self.probe()
+        if self._prober is None and self.probe_interval > 0:
+            self._prober = threading.Thread(target=self._probe_loop, name="rpc-probe", daemon=True)
+            self._prober.start()
+        return up
+
+    def _probe_loop(self):
+        while True:
+            time.sleep(self.probe_interval)
+            try: self.probe()
+            except Exception as e: print(f"⚠️ RPC probe failed: {e}")
+
+    @property
+    def primary(self):
+        return self.ranked[0] if self.ranked else None
+
+    # -- provider interface --
+    def make_request(self, method, params):
+        # web3's validation middleware asks for the chain id before every eth_call; it never changes
+        if method == "eth_chainId" and self._chain_id: return self._chain_id
+        self.stats["calls"] += 1
+        if method == "eth_chainId":
+            self._chain_id = self._failover(list(self.ranked), method, params)
+            return self._chain_id
+        order = list(self.ranked)
+        if self.hedge and method in READ_METHODS and len(order) > 1 and order[1].healthy:
+            return self._hedged(order, method, params)
+        return self._failover(order, method, params)
+
+    def _failover(self, order, method, params):
+        err = None
+        for i, ep in enumerate(order):
+            try:
+                if i: self.stats["failovers"] += 1
+                return ep.call(method, params)
+            except Exception as e:
+                err = e
+        raise err or ConnectionError("no RPC endpoints configured")
+
+    def _hedged(self, order, method, params):
+        first, second = order[0], order[1]
+        deadline = max(first.p95() or RPC_TIMEOUT, HEDGE_MIN_DEADLINE)
+        fut = self._pool.submit(first.call, method, params)
+        done, _ = wait([fut], timeout=deadline)
+        if done and not fut.exception(): return fut.result()
+        self.stats["hedged"] += 1
+        backup = self._pool.submit(second.call, method, params)
+        pending = {fut, backup}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for f in done:
+                if not f.exception():
+                    if f is backup: self.stats["hedge_wins"] += 1
+                    return f.result()
+        # Both lost: try whatever is left in rank order
+        return self._failover(order[2:] or order, method, params)
+
+    def make_batch_request(self, requests):
+        return self.primary.provider.make_batch_request(requests)
+
+    def is_connected(self, show_traceback=False):
+        return any(ep.healthy for ep in self.endpoints) or super().is_connected(show_traceback)
+
+    # -- reporting --
+    def histograms(self):
+        """{url: {"<=5ms": n, ..., ">5000ms": n}} of every observed call and probe."""
+        labels = [f"<={b}ms" for b in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"]
+        return {ep.url: dict(zip(labels, ep.hist)) for ep in self.endpoints}
+
+    def endpoint_stats(self):
+        out = []
+        for ep in self.ranked:
+            ms = np.array(ep.samples) * 1e3
+            out.append({"url": ep.url, "healthy": ep.healthy, "head": ep.head, "errors": ep.errors,
+                        "p50_ms": round(float(np.percentile(ms, 50)), 1) if len(ms) else None,
+                        "p95_ms": round(float(np.percentile(ms, 95)), 1) if len(ms) else None})
+        return out
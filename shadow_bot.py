@@ -1,9 +1,13 @@
 import os
 import asyncio
-import requests
 import json
 from decimal import Decimal, getcontext
 from dotenv import load_dotenv
+load_dotenv()  # before the project modules below read their env config
+from http_engine import HTTP
+from async_rpc import AsyncRpc
+from nonce_manager import NonceManager
+from fee_oracle import FeeOracle
 from eth_account import Account
 from web3 import Web3
 from web3.middleware import ExtraDataToPOAMiddleware
@@ -12,12 +16,14 @@ from telegram.ext import ApplicationBuilder, CommandHandler, CallbackQueryHandle
 
 # Set financial precision
 getcontext().prec = 28
-load_dotenv()
 
 # --- 1. BLOCKCHAIN & PROTOCOL SETUP ---
 RPC_URL = os.getenv("RPC_URL", "https://arb1.arbitrum.io/rpc") 
 w3 = Web3(Web3.HTTPProvider(RPC_URL))
 w3.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
+ASYNC_RPC = AsyncRpc([RPC_URL])  # awaited by handlers so RPC latency never blocks the bot
+NONCES = NonceManager(w3)
+FEES = FeeOracle(w3)
 
 # Buffer Finance Mainnet Addresses (Arbitrum)
 BUFFER_ROUTER = "0x4Dbd...AB3f" # Example Router
@@ -35,8 +41,7 @@ contract = w3.eth.contract(address=BUFFER_ROUTER, abi=BUFFER_ABI)
 # --- 2. PRECISION PRICE & EXECUTION ---
 def get_pol_price_cad():
     try:
-        url = "https://api.coingecko.com/api/v3/simple/price?ids=polygon-ecosystem-token&vs_currencies=cad"
-        res = requests.get(url, timeout=5).json()
+        res = HTTP.get_json("https://api.coingecko.com/api/v3/simple/price", params={"ids": "polygon-ecosystem-token", "vs_currencies": "cad"})
         return Decimal(str(res['polygon-ecosystem-token']['cad']))
     except:
         return Decimal('0.1478') # Fallback for Feb 2026
@@ -59,11 +64,11 @@ async def execute_protocol_trade(context, chat_id, side):
         usdc_amount = int(Decimal(str(stake_cad)) * Decimal('0.72') * 10**6) 
 
         # Build Protocol Transaction
-        nonce = w3.eth.get_transaction_count(vault.address)
+        fees = FEES.fees()  # EIP-1559 fields from the per-block cache
         
         # Buffer initiateTrade signature: (uint256 amount, uint256 assetPair, uint256 direction, uint256 timeframe)
         # timeframe: 300 = 5 minutes
-        tx = contract.functions.initiateTrade(
+        build = lambda nonce: contract.functions.initiateTrade(
             usdc_amount,
             0, # BTC Pair Index
             direction,
@@ -72,13 +77,12 @@ async def execute_protocol_trade(context, chat_id, side):
             'from': vault.address,
             'nonce': nonce,
             'gas': 450000,
-            'gasPrice': w3.eth.gas_price,
+            **fees,
             'chainId': 42161
         })
 
-        # Sign & Send
-        signed_tx = w3.eth.account.sign_transaction(tx, PK)
-        tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+        # Sign & Send (nonce from the local allocator: no round trip, no collisions between clicks)
+        tx_hash = NONCES.send(vault.address, build, PK)
 
         report = (
             f"✅ **PROTOCOL HIT!**\n"
@@ -94,8 +98,9 @@ async def execute_protocol_trade(context, chat_id, side):
 
 # --- 3. UI HANDLERS ---
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    bal_pol = w3.from_wei(w3.eth.get_balance(vault.address), 'ether')
-    price = float(get_pol_price_cad())
+    aw3 = await ASYNC_RPC.w3()
+    bal_wei, price = await asyncio.gather(aw3.eth.get_balance(vault.address), asyncio.to_thread(get_pol_price_cad))
+    bal_pol, price = w3.from_wei(bal_wei, 'ether'), float(price)
     keyboard = [['🚀 Start Trading', '⚙️ Settings'], ['💰 Wallet', '📤 Withdraw']]
     await update.message.reply_text(
         f"🕴️ **Shadow Engine v5 (DeFi)**\n\n💵 **Vault:** {bal_pol:.4f} POL (**${float(bal_pol)*price:.2f} CAD**)\n"
@@ -125,5 +130,6 @@ if __name__ == "__main__":
     app.add_handler(CommandHandler("start", start))
     app.add_handler(CallbackQueryHandler(handle_interaction))
     app.add_handler(MessageHandler(filters.TEXT & (~filters.COMMAND), lambda u, c: None))
+    FEES.start()  # background per-block refresh, so handlers never wait on the node for fees
     print(f"Shadow Bot Live: {vault.address}")
     app.run_polling()
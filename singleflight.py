@@ -0,0 +1,29 @@
+import asyncio
+
+# --- REQUEST COALESCING ---
+class SingleFlight:
+    """
+    At most one in-flight call per key. Callers that arrive while it runs
+    await the same future and get the same result (or the same exception).
+    """
+    def __init__(self):
+        self._inflight = {}
+        self.fresh = 0
+        self.coalesced = 0
+
+    async def do(self, key, fn):
+        fut = self._inflight.get(key)
+        if fut is not None:
+            self.coalesced += 1
+        else:
+            self.fresh += 1
+            fut = self._inflight[key] = asyncio.ensure_future(fn())
+            fut.add_done_callback(lambda _f: self._inflight.pop(key, None))
+        # shield: one impatient caller being cancelled must not kill everyone's scan
+        return await asyncio.shield(fut)
+
+    def stats(self):
+        total = self.fresh + self.coalesced
+        return {"fresh": self.fresh, "coalesced": self.coalesced,
+                "coalesced_pct": round(100 * self.coalesced / total, 1) if total else 0.0,
+                "inflight": len(self._inflight)}
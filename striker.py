@@ -1,11 +1,11 @@
-import os, asyncio, requests
+import os, asyncio
 from dotenv import load_dotenv
+load_dotenv()  # before the project modules below read their env config
 from eth_account import Account
 from py_clob_client.client import ClobClient
 from py_clob_client.clob_types import MarketOrderArgs, OrderType
 from py_clob_client.order_builder.constants import BUY
-
-load_dotenv()
+from http_engine import ENGINE
 
 def init_clob():
     seed = os.getenv("WALLET_SEED", "").strip()
@@ -25,11 +25,12 @@ async def run_striker():
     client = init_clob()
     stake = 10.0 # Set your winning bet size here
     print("🎯 Oracle Striker Sidecar Active. Hunting winning windows...")
+    await ENGINE.prewarm()
 
     while True:
         try:
             # Poll Gamma API for active, unclosed events
-            r = requests.get("https://gamma-api.polymarket.com/events?active=true&closed=false&limit=20").json()
+            r = await ENGINE.get_json("https://gamma-api.polymarket.com/events", params={"active": "true", "closed": "false", "limit": 20})
             for event in r:
                 for market in event.get('markets', []):
                     price = float(market.get('outcomePrices', [0])[0])
@@ -0,0 +1,244 @@
+import math
+import time
+import numpy as np
+
+# --- 1. TICK GRID ---
+# 0.001 .. 0.999 covers the 0.01 and 0.001 tick sizes. Markets near 0 or 1 can
+# switch to 0.0001 ticks; those prices are off this grid and raise ValueError,
+# so callers fall back to a dict book for that token.
+TICK = 0.001
+N_TICKS = 999
+
+def tick_index(price):
+    p = float(price)
+    i = int(round(p / TICK)) - 1
+    if not 0 <= i < N_TICKS or abs(p - (i + 1) * TICK) > 1e-9:
+        raise ValueError(f"price {price} is off the {TICK} tick grid")
+    return i
+
+def tick_floor(price):
+    """Index of the last tick at or below a limit price (-1 if below the grid); never raises."""
+    return min(max(int(float(price) / TICK + 1e-9) - 1, -1), N_TICKS - 1)
+
+def tick_price(i):
+    return round((int(i) + 1) * TICK, 3)
+
+def fmt_num(x):
+    """Float -> the CLOB's string form: '0.48', '30', '12.5' (no trailing .0)."""
+    x = float(x)
+    return str(int(x)) if x.is_integer() else repr(x)
+
+# --- 2. SHARED STORAGE ---
+class TickBookPool:
+    """
+    Preallocated (block x 999) size arrays for bids and asks, one row per
+    token. Storage grows a whole block at a time and existing blocks never
+    move, so every book can keep direct views onto its own rows. Released
+    rows are zeroed and handed out again before the pool grows.
+    """
+    def __init__(self, block=1024, dtype=np.float64):
+        self.block = block
+        self.dtype = dtype
+        self.bid_blocks, self.ask_blocks = [], []
+        self.rows = 0
+        self.free = []
+
+    def alloc(self):
+        """(row, bid_view, ask_view) for a new book."""
+        row = self.free.pop() if self.free else self.rows
+        b, r = divmod(row, self.block)
+        if b == len(self.bid_blocks):
+            self.bid_blocks.append(np.zeros((self.block, N_TICKS), dtype=self.dtype))
+            self.ask_blocks.append(np.zeros((self.block, N_TICKS), dtype=self.dtype))
+        if row == self.rows: self.rows += 1
+        return row, self.bid_blocks[b][r], self.ask_blocks[b][r]
+
+    def release(self, row):
+        b, r = divmod(row, self.block)
+        self.bid_blocks[b][r] = 0
+        self.ask_blocks[b][r] = 0
+        self.free.append(row)
+
+    def ask_depth_all(self, limit_price):
+        """Ask size at or below limit_price for every allocated book, one vectorized pass per block."""
+        hi = tick_floor(limit_price) + 1
+        out = np.concatenate([blk[:, :hi].sum(axis=1) for blk in self.ask_blocks]) if self.ask_blocks else np.zeros(0)
+        return out[:self.rows]
+
+    @property
+    def nbytes(self):
+        return sum(b.nbytes for b in self.bid_blocks + self.ask_blocks)
+
+POOL = TickBookPool()
+
+# --- 3. BOOK ---
+class TickBook:
+    """
+    One token's book as a pair of rows in the pool, indexed by tick. Level
+    updates are O(1); best bid/ask are cached indices that only rescan
+    (vectorized) when the best level itself is emptied. Keeps the LocalBook
+    interface so BookMirror can use either.
+    """
+    __slots__ = ("_pool", "_row", "_bids", "_asks", "bid_i", "ask_i", "hash", "timestamp", "updated_at")
+
+    def __init__(self, pool=None):
+        self._pool = pool or POOL
+        self._row, self._bids, self._asks = self._pool.alloc()
+        self.bid_i = self.ask_i = -1
+        self.hash = self.timestamp = None
+        self.updated_at = 0.0
+
+    def release(self):
+        """Returns the pool rows; the book must not be used afterwards."""
+        if self._row is not None:
+            self._pool.release(self._row)
+            self._row = None
+
+    def _rescan_bid(self, below=N_TICKS - 1):
+        # Nothing can sit above the level that was just emptied, so only scan below it
+        nz = np.flatnonzero(self._bids[:below + 1])
+        self.bid_i = int(nz[-1]) if len(nz) else -1
+
+    def _rescan_ask(self, above=0):
+        nz = np.flatnonzero(self._asks[above:])
+        self.ask_i = int(nz[0]) + above if len(nz) else -1
+
+    def snapshot(self, bids, asks, hash=None, timestamp=None):
+        # Index every level first, so an off-grid price raises before the book is touched
+        bids = [(tick_index(l['price']), float(l['size'])) for l in bids or []]
+        asks = [(tick_index(l['price']), float(l['size'])) for l in asks or []]
+        b, a = self._bids, self._asks
+        b[:] = 0
+        a[:] = 0
+        for i, size in bids: b[i] = size
+        for i, size in asks: a[i] = size
+        self._rescan_bid()
+        self._rescan_ask()
+        self.hash, self.timestamp, self.updated_at = hash, timestamp, time.time()
+
+    def apply(self, side, price, size):
+        """One level delta. side is BUY (bids) or SELL (asks); size 0 removes the level. Off-grid prices raise ValueError."""
+        i, size = tick_index(price), float(size)
+        if side[0] in "Bb":
+            self._bids[i] = size
+            if size > 0:
+                if i > self.bid_i: self.bid_i = i
+            elif i == self.bid_i: self._rescan_bid(i)
+        else:
+            self._asks[i] = size
+            if size > 0:
+                if self.ask_i < 0 or i < self.ask_i: self.ask_i = i
+            elif i == self.ask_i: self._rescan_ask(i)
+        self.updated_at = time.time()
+
+    # -- reads (LocalBook-compatible) --
+    @property
+    def best_bid(self): return tick_price(self.bid_i) if self.bid_i >= 0 else None
+
+    @property
+    def best_ask(self): return tick_price(self.ask_i) if self.ask_i >= 0 else None
+
+    @property
+    def bids(self):
+        return {tick_price(i): float(self._bids[i]) for i in np.flatnonzero(self._bids)}
+
+    @property
+    def asks(self):
+        return {tick_price(i): float(self._asks[i]) for i in np.flatnonzero(self._asks)}
+
+    def top(self, side="SELL"):
+        if side[0] in "Bb":
+            return (tick_price(self.bid_i), float(self._bids[self.bid_i])) if self.bid_i >= 0 else None
+        return (tick_price(self.ask_i), float(self._asks[self.ask_i])) if self.ask_i >= 0 else None
+
+    def ask_ladder(self):
+        return [(tick_price(i), float(self._asks[i])) for i in np.flatnonzero(self._asks)]
+
+    def depth(self, side="SELL", limit_price=None):
+        """Total size up to (asks) / down to (bids) limit_price, one vectorized sum."""
+        if side[0] in "Bb":
+            lo = 0 if limit_price is None else max(math.ceil(float(limit_price) / TICK - 1e-9) - 1, 0)  # first tick at or above
+            return float(self._bids[lo:].sum())
+        hi = N_TICKS if limit_price is None else tick_floor(limit_price) + 1
+        return float(self._asks[:hi].sum())
+
+    def cost_to_fill(self, shares):
+        """USDC to lift `shares` off the asks (None if the book is too thin)."""
+        cum = np.cumsum(self._asks)
+        if cum[-1] < shares: return None
+        k = int(np.searchsorted(cum, shares))
+        take = self._asks[:k + 1].copy()
+        take[k] -= cum[k] - shares
+        return float(np.dot((np.arange(k + 1) + 1) * TICK, take))
+
+    def as_rest_book(self, asset_id):
+        return {"asset_id": asset_id, "hash": self.hash, "timestamp": self.timestamp,
+                "bids": [{"price": fmt_num(p), "size": fmt_num(s)} for p, s in sorted(self.bids.items())],
+                "asks": [{"price": fmt_num(p), "size": fmt_num(s)} for p, s in sorted(self.asks.items(), reverse=True)]}
+
+# --- 4. REST ADAPTER ---
+_BY_TOKEN = {}
+
+def load_rest_book(token_id, raw, pool=None):
+    """
+    Loads a /books entry (dict) or py_clob_client OrderBookSummary into the
+    token's TickBook, reusing its pool row across calls. A book with prices
+    off the 0.001 grid (0.0001-tick markets) is kept in a dict LocalBook instead.
+    """
+    if isinstance(raw, dict):
+        args = (raw.get('bids'), raw.get('asks'), raw.get('hash'), raw.get('timestamp'))
+    else:
+        levels = lambda side: [{"price": l.price, "size": l.size} for l in side or []]
+        args = (levels(raw.bids), levels(raw.asks), getattr(raw, 'hash', None), getattr(raw, 'timestamp', None))
+    book = _BY_TOKEN.get(str(token_id))
+    if book is None:
+        book = _BY_TOKEN[str(token_id)] = TickBook(pool)
+    try:
+        book.snapshot(*args)
+    except ValueError:
+        from book_mirror import LocalBook
+        book.release()
+        book = _BY_TOKEN[str(token_id)] = LocalBook()
+        book.snapshot(*args)
+    return book
+
+# --- 5. BENCHMARK ---
+def benchmark(n_tokens=10_000, updates=200_000, seed=7):
+    """TickBook vs the dict-backed LocalBook from book_mirror."""
+    from book_mirror import LocalBook
+    rng = np.random.default_rng(seed)
+    toks = rng.integers(0, n_tokens, updates)
+    prices = np.round(rng.integers(300, 700, updates) * TICK, 3)
+    sizes = np.where(rng.random(updates) < 0.3, 0.0, rng.integers(1, 1000, updates).astype(float))
+
+    pool = TickBookPool()
+    tick_books = [TickBook(pool) for _ in range(n_tokens)]
+    dict_books = [LocalBook() for _ in range(n_tokens)]
+    tl, pl, sl = toks.tolist(), prices.tolist(), sizes.tolist()
+
+    t0 = time.perf_counter()
+    for t, p, s in zip(tl, pl, sl): tick_books[t].apply("SELL", p, s)
+    t_tick = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for t, p, s in zip(tl, pl, sl): dict_books[t].apply("SELL", p, s)
+    t_dict = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    d_tick = [b.depth("SELL", 0.55) for b in tick_books]
+    t_dtick = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    d_dict = [sum(s for p, s in b.asks.items() if p <= 0.55) for b in dict_books]
+    t_ddict = time.perf_counter() - t0
+    # Whole-universe depth in a single pass over the pool
+    t0 = time.perf_counter()
+    d_pool = pool.ask_depth_all(0.55)
+    t_dpool = time.perf_counter() - t0
+
+    ok = all(b.best_ask == d.best_ask for b, d in zip(tick_books, dict_books)) and np.allclose(d_tick, d_dict) and np.allclose(d_pool, d_dict)
+    print(f"📚 BOOKS x{n_tokens}, {updates} updates: tick {t_tick / updates * 1e9:.0f}ns/upd | dict {t_dict / updates * 1e9:.0f}ns/upd")
+    print(f"   depth<=0.55 all books: tick {t_dtick * 1e3:.1f}ms | dict {t_ddict * 1e3:.1f}ms | pool-vectorized {t_dpool * 1e3:.2f}ms | match {ok}")
+    print(f"   memory: {pool.nbytes / 1e6:.0f}MB preallocated")
+    return ok
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,71 @@
+import os
+import time
+import asyncio
+from multicall import ViewResults, read_views_async
+
+# --- 1. CONFIG ---
+HEAD_POLL_INTERVAL = float(os.getenv("HEAD_POLL_INTERVAL", 1.0))  # Polygon blocks land every ~2s
+HEAD_MAX_AGE = float(os.getenv("HEAD_MAX_AGE", 4.0))              # ~2 blocks without a head update -> stop trusting the cache
+
+# --- 2. CACHE ---
+class BlockViewCache:
+    """
+    View-call results keyed by (contract, calldata, block). A view can only
+    change when a new block lands, so everything is dropped when the head
+    moves; until then repeated reads (e.g. VAULT pressed twice) cost no RPC.
+    The head comes from watch(), a cheap eth_blockNumber poll; without it the
+    head is learned from each batch's own block. If the head hasn't been
+    confirmed for max_age seconds (polling failing), the cache is bypassed
+    and reads go to "latest" until a fresh head comes in.
+    """
+    def __init__(self, max_age=HEAD_MAX_AGE):
+        self.head = None
+        self.head_at = 0.0   # monotonic time the head was last confirmed
+        self.max_age = max_age
+        self.entries = {}   # (target, calldata, block) -> decoded value
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0, "stale_bypass": 0}
+
+    def set_head(self, block):
+        if block is None or (self.head is not None and block < self.head): return
+        self.head_at = time.monotonic()
+        if block != self.head:
+            self.head = block
+            self.entries.clear()
+            self.stats["invalidations"] += 1
+
+    async def watch(self, get_w3, interval=HEAD_POLL_INTERVAL):
+        """Polls the head forever; get_w3 is an async factory such as AsyncRpc.w3."""
+        while True:
+            try:
+                aw3 = await get_w3()
+                self.set_head(await aw3.eth.block_number)
+            except Exception as e:
+                print(f"⚠️ HEAD POLL failed: {e}")
+            await asyncio.sleep(interval)
+
+    async def read(self, aw3, calls):
+        """Cached read_views_async: only the calls not yet read at the current head go on the wire."""
+        keys = {name: (fn.address, fn._encode_transaction_data()) for name, fn in calls.items()}
+        head = self.head
+        if head is not None and time.monotonic() - self.head_at > self.max_age:
+            # The head may have moved without us hearing about it; don't serve a possibly stale block
+            self.stats["stale_bypass"] += 1
+            head = None
+        missing = {n: fn for n, fn in calls.items() if head is None or keys[n] + (head,) not in self.entries}
+        self.stats["hits"] += len(calls) - len(missing)
+        self.stats["misses"] += len(missing)
+        out = ViewResults({n: self.entries[keys[n] + (head,)] for n in calls if n not in missing})
+        if missing:
+            # Pin to the head we looked up, so the fresh values share a block with the cached ones
+            res = await read_views_async(aw3, missing, block_identifier=head if head is not None else "latest")
+            self.set_head(res.block)
+            head = res.block
+            for n in missing:
+                self.entries[keys[n] + (head,)] = res[n]
+                out[n] = res[n]
+        out.block = head
+        return out
+
+    def hit_rate(self):
+        total = self.stats["hits"] + self.stats["misses"]
+        return round(100.0 * self.stats["hits"] / total, 1) if total else None